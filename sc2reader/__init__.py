@@ -12,7 +12,7 @@
         SC2READER_CACHE_MAX_SIZE = MAXIMUM_CACHE_ENTRIES_TO_HOLD_IN_MEMORY
 
     You can also set the default factory via setFactory, useFileCache, useDictCache,
-    or useDoubleCache functions.
+    useDoubleCache, or useParseCache functions.
 
     :copyright: (c) 2011 by Graylin Kim.
     :license: MIT, see LICENSE for more details.
@@ -43,6 +43,11 @@ def setFactory(factory):
         * sc2reader.load_replay(s)
         * sc2reader.load_map(s)
         * sc2reader.load_game_summar(y|ies)
+        * sc2reader.iter_events
+        * sc2reader.map_replays
+        * sc2reader.reduce_replays
+        * sc2reader.probe, sc2reader.probe_replay(s)
+        * sc2reader.aload_replay(s), sc2reader.aload_map(s)
         * sc2reader.configure
         * sc2reader.reset
         * sc2reader.register_plugin
@@ -56,6 +61,16 @@ def setFactory(factory):
     module.load_map = factory.load_map
     module.load_game_summaries = factory.load_game_summaries
     module.load_game_summary = factory.load_game_summary
+    module.iter_events = factory.iter_events
+    module.map_replays = factory.map_replays
+    module.reduce_replays = factory.reduce_replays
+    module.probe = factory.probe_replay
+    module.probe_replay = factory.probe_replay
+    module.probe_replays = factory.probe_replays
+    module.aload_replays = factory.aload_replays
+    module.aload_replay = factory.aload_replay
+    module.aload_maps = factory.aload_maps
+    module.aload_map = factory.aload_map
 
     module.configure = factory.configure
     module.reset = factory.reset
@@ -96,6 +111,17 @@ def useDoubleCache(cache_dir, cache_max_size=0, **options):
     setFactory(factories.DoubleCachedSC2Factory(cache_dir, cache_max_size, **options))
 
 
+def useParseCache(cache_dir, **options):
+    """
+    :param cache_dir: Absolute path to the existing cache directory
+
+    Set the default factory to a new ParseCachedSC2Factory with the given cache_dir.
+    Decoded replay data is saved to the file system so that loading the same
+    replay again skips extracting and decoding the replay archive.
+    """
+    setFactory(factories.ParseCachedSC2Factory(cache_dir, **options))
+
+
 # Allow environment variables to activate caching
 cache_dir = os.getenv("SC2READER_CACHE_DIR")
 cache_max_size = os.getenv("SC2READER_CACHE_MAX_SIZE")
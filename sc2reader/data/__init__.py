@@ -1,11 +1,17 @@
+from collections.abc import Mapping
 import json
+import marshal
+import os
 import pkgutil
+import sys
+import tempfile
 
 try:
     from collections import OrderedDict
 except ImportError as e:
     from ordereddict import OrderedDict
 
+from sc2reader import log_utils
 from sc2reader.log_utils import loggable
 
 try:
@@ -13,29 +19,40 @@ try:
 except NameError:
     cmp = lambda a, b: (a > b) - (a < b)  # noqa Python 3
 
+#: The version of the compiled datapacks file format. Bump this whenever the
+#: :class:`Build` structure changes so that stale compiled files are ignored.
+COMPILED_DATAPACKS_VERSION = 2
+
+#: The name of the compiled datapacks file, formatted with the format version
+#: and the Python version as marshal data is specific to the Python version.
+COMPILED_DATAPACKS = "datapacks-{}-py{}{}.bin"
+
+abil_data = pkgutil.get_data("sc2reader.data", "ability_lookup.csv")
 ABIL_LOOKUP = dict()
-for entry in (
-    pkgutil.get_data("sc2reader.data", "ability_lookup.csv").decode("utf8").split("\n")
-):
+for entry in abil_data.decode("utf8").split("\n"):
     if not entry:
         continue
     str_id, abilities = entry.split(",", 1)
     ABIL_LOOKUP[str_id] = abilities.split(",")
 
+unit_lookup_data = pkgutil.get_data("sc2reader.data", "unit_lookup.csv")
 UNIT_LOOKUP = dict()
-for entry in (
-    pkgutil.get_data("sc2reader.data", "unit_lookup.csv").decode("utf8").split("\n")
-):
+for entry in unit_lookup_data.decode("utf8").split("\n"):
     if not entry:
         continue
     str_id, title = entry.strip().split(",")
     UNIT_LOOKUP[str_id] = title
 
-unit_data = pkgutil.get_data("sc2reader.data", "unit_info.json").decode("utf8")
-unit_lookup = json.loads(unit_data)
+unit_data = pkgutil.get_data("sc2reader.data", "unit_info.json")
+unit_lookup = json.loads(unit_data.decode("utf8"))
 
-command_data = pkgutil.get_data("sc2reader.data", "train_commands.json").decode("utf8")
-train_commands = json.loads(command_data)
+# The unit_info values and their defaults, in the order UnitType takes them
+unit_lookup_defaults = dict(
+    minerals=0, vespene=0, supply=0, is_building=False, is_worker=False, is_army=False
+)
+
+command_data = pkgutil.get_data("sc2reader.data", "train_commands.json")
+train_commands = json.loads(command_data.decode("utf8"))
 
 
 class Unit:
@@ -218,7 +235,10 @@ class Unit:
 
 
 class UnitType:
-    """Represents an in game unit type"""
+    """
+    Represents an in game unit type. Unit types are shared between the
+    builds they are identical in and should be treated as read only.
+    """
 
     def __init__(
         self,
@@ -269,7 +289,10 @@ class UnitType:
 
 
 class Ability:
-    """Represents an in-game ability"""
+    """
+    Represents an in-game ability. Abilities are shared between the builds
+    they are identical in and should be treated as read only.
+    """
 
     def __init__(
         self, id, name=None, title=None, is_build=False, build_time=0, build_unit=None
@@ -396,33 +419,46 @@ class Build:
         self.units[str_id] = unit
 
 
-def load_build(expansion, version):
-    build = Build(version)
+def get_build_data(expansion, version):
+    """
+    Returns the raw contents of the units and abilities csv files for a build.
+    """
+    return (
+        pkgutil.get_data("sc2reader.data", f"{expansion}/{version}_units.csv"),
+        pkgutil.get_data("sc2reader.data", f"{expansion}/{version}_abilities.csv"),
+    )
 
-    unit_file = f"{expansion}/{version}_units.csv"
-    for entry in (
-        pkgutil.get_data("sc2reader.data", unit_file).decode("utf8").split("\n")
-    ):
+
+def parse_build(expansion, version, build_data=None):
+    """
+    Parses the data files for a build into rows of arguments for
+    :meth:`Build.add_unit_type` and :meth:`Build.add_ability`, see
+    :func:`create_build`.
+    """
+    unit_data, abil_data = build_data or get_build_data(expansion, version)
+
+    unit_rows = list()
+    for entry in unit_data.decode("utf8").split("\n"):
         if not entry:
             continue
         int_id, str_id = entry.strip().split(",")
         unit_type = int(int_id, 10)
         title = UNIT_LOOKUP[str_id]
 
-        values = dict(type_id=unit_type, str_id=str_id, name=title)
+        values = dict(unit_lookup_defaults, race="Neutral")
         for race in ("Protoss", "Terran", "Zerg"):
             if title.lower() in unit_lookup[race]:
                 values.update(unit_lookup[race][title.lower()])
                 values["race"] = race
                 break
 
-        build.add_unit_type(**values)
+        unit_rows.append(
+            (unit_type, str_id, title, title, values.pop("race"))
+            + tuple(values[key] for key in unit_lookup_defaults)
+        )
 
-    abil_file = f"{expansion}/{version}_abilities.csv"
-    build.add_ability(ability_id=0, name="RightClick", title="Right Click")
-    for entry in (
-        pkgutil.get_data("sc2reader.data", abil_file).decode("utf8").split("\n")
-    ):
+    abil_rows = [(0, "RightClick", "Right Click", False, None, "")]
+    for entry in abil_data.decode("utf8").split("\n"):
         if not entry:
             continue
         int_id_base, str_id = entry.strip().split(",")
@@ -441,45 +477,299 @@ def load_build(expansion, version):
             ):  # Not really sure how to handle hallucinations
                 unit_name = unit_name[12:]
 
-            build.add_ability(
-                ability_id=int_id_base | index,
-                name=ability_name,
-                is_build=bool(unit_name),
-                build_unit=getattr(build, unit_name, None),
-                build_time=build_time,
+            abil_rows.append(
+                (
+                    int_id_base | index,
+                    ability_name,
+                    ability_name,
+                    bool(unit_name),
+                    build_time,
+                    unit_name,
+                )
             )
 
+    return unit_rows, abil_rows
+
+
+# Most unit types and abilities carry over unchanged from one build to the
+# next, so builds created from rows share a single instance of each. They
+# are indexed by id alone to avoid keeping a copy of every row around.
+shared_unit_types = dict()
+shared_abilities = dict()
+
+
+def get_shared_unit_type(row):
+    candidates = shared_unit_types.setdefault(row[0], [])
+    for unit in candidates:
+        if unit.str_id == row[1] and row == (
+            unit.id,
+            unit.str_id,
+            unit.name,
+            unit.title,
+            unit.race,
+            unit.minerals,
+            unit.vespene,
+            unit.supply,
+            unit.is_building,
+            unit.is_worker,
+            unit.is_army,
+        ):
+            return unit
+
+    unit = UnitType(*row)
+    candidates.append(unit)
+    return unit
+
+
+def get_shared_ability(ability_id, name, title, is_build, build_time, build_unit):
+    candidates = shared_abilities.setdefault(ability_id, [])
+    for ability in candidates:
+        if (
+            ability.name == name
+            and ability.build_unit is build_unit
+            and ability.title == title
+            and ability.is_build == is_build
+            and ability.build_time == build_time
+        ):
+            return ability
+
+    ability = Ability(ability_id, name, title, is_build, build_time, build_unit)
+    candidates.append(ability)
+    return ability
+
+
+def create_build(version, unit_rows, abil_rows):
+    """
+    Creates a build from the rows returned by :func:`parse_build`. Unit types
+    and abilities identical to ones in previously created builds are shared
+    with those builds rather than created again.
+    """
+    # Same as Build.add_unit_type and Build.add_ability, but without the
+    # keyword argument handling which makes up most of the cost.
+    build = Build(version)
+    units = build.units
+    for row in unit_rows:
+        unit = get_shared_unit_type(row)
+        setattr(build, unit.name, unit)
+        units[unit.id] = unit
+        units[unit.str_id] = unit
+
+    # Build units are looked up as the abilities are added, which can pick
+    # up an ability of the same name that was added earlier.
+    abilities = build.abilities
+    for ability_id, name, title, is_build, build_time, unit_name in abil_rows:
+        build_unit = getattr(build, unit_name, None)
+        ability = get_shared_ability(
+            ability_id, name, title, is_build, build_time, build_unit
+        )
+        setattr(build, name, ability)
+        abilities[ability_id] = ability
     return build
 
 
-# Load the WoL Data
-wol_builds = dict()
-for version in ("16117", "17326", "18092", "19458", "22612", "24944"):
-    wol_builds[version] = load_build("WoL", version)
-
-# Load HotS Data
-hots_builds = dict()
-for version in ("base", "23925", "24247", "24764"):
-    hots_builds[version] = load_build("HotS", version)
-hots_builds["38215"] = load_build("LotV", "base")
-hots_builds["38215"].id = "38215"
-
-# Load LotV Data
-lotv_builds = dict()
-for version in (
-    "base",
-    "44401",
-    "47185",
-    "48258",
-    "53644",
-    "54724",
-    "59587",
-    "70154",
-    "76114",
-    "77379",
-    "80949",
-    "89720",
-):
-    lotv_builds[version] = load_build("LotV", version)
+def load_build(expansion, version, build_data=None):
+    return create_build(version, *parse_build(expansion, version, build_data))
+
+
+_compiled_builds = None
+
+
+def get_compiled_builds():
+    """
+    Returns the builds stored in the compiled datapacks file as a dict of
+    (expansion, version) to marshaled build rows. The file is read once. If
+    it is missing or stale every registered build is parsed and the file is
+    written again, see :func:`compile_datapacks`. The parsed builds are still
+    used if the file can't be written.
+    """
+    global _compiled_builds
+    if _compiled_builds is None:
+        logger = log_utils.get_logger(get_compiled_builds)
+        header = get_compiled_header()
+        path = get_compiled_path()
+        try:
+            with open(path, "rb") as compiled_file:
+                compiled_header, builds = marshal.loads(compiled_file.read())
+        except (OSError, ValueError, EOFError, TypeError) as e:
+            logger.debug("Unable to read %s: %r", path, e)
+            compiled_header, builds = None, None
+
+        if compiled_header == header:
+            _compiled_builds = builds
+        else:
+            logger.debug("Compiling the datapacks into %s", path)
+            _compiled_builds = compile_builds()
+            try:
+                write_compiled_builds(path, header, _compiled_builds)
+            except OSError as e:
+                logger.debug("Unable to write %s: %r", path, e)
+
+    return _compiled_builds
+
+
+def get_compiled_path():
+    """
+    Returns the path of the compiled datapacks file, which is kept in the
+    ``SC2READER_CACHE_DIR`` directory if set and otherwise in an sc2reader
+    directory in the user's cache directory.
+    """
+    cache_dir = os.getenv("SC2READER_CACHE_DIR")
+    if not cache_dir:
+        user_cache_dir = os.getenv("XDG_CACHE_HOME") or os.getenv("LOCALAPPDATA")
+        if not user_cache_dir:
+            user_cache_dir = os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(user_cache_dir, "sc2reader")
+
+    name = COMPILED_DATAPACKS.format(COMPILED_DATAPACKS_VERSION, *sys.version_info[:2])
+    return os.path.join(cache_dir, name)
+
+
+def get_compiled_header():
+    # Marshal data is only guaranteed to be readable by the same Python
+    # version. The data files are checked by their size and modification
+    # time so that they aren't read just to find out they haven't changed.
+    data_dir = os.path.dirname(os.path.abspath(__file__))
+    manifest = list()
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = sorted(name for name in dirs if name != "__pycache__")
+        for name in sorted(files):
+            if name.endswith((".csv", ".json")):
+                stat = os.stat(os.path.join(root, name))
+                manifest.append(
+                    (
+                        os.path.relpath(os.path.join(root, name), data_dir),
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                    )
+                )
+
+    return (COMPILED_DATAPACKS_VERSION, sys.version_info[:2], data_dir, manifest)
+
+
+def load_compiled_build(expansion, version):
+    """
+    Loads a build from the compiled datapacks file, falling back to parsing
+    the csv files for builds that aren't registered in :data:`datapacks`.
+    """
+    compiled = get_compiled_builds().get((expansion, version))
+    if compiled is not None:
+        return create_build(version, *marshal.loads(compiled))
+    return load_build(expansion, version)
+
+
+def compile_builds():
+    """
+    Parses every registered build and returns them as a dict of (expansion,
+    version) to marshaled build rows.
+    """
+    builds = dict()
+    for lazy_builds in datapacks.values():
+        for expansion, version in lazy_builds.versions.values():
+            rows = parse_build(expansion, version)
+            builds[(expansion, version)] = marshal.dumps(rows)
+    return builds
+
+
+def write_compiled_builds(path, header, builds):
+    # Write to a temporary file first so that concurrent loads never see a
+    # partially written file.
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir)
+    try:
+        with os.fdopen(fd, "wb") as compiled_file:
+            compiled_file.write(marshal.dumps((header, builds)))
+        os.replace(temp_path, path)
+    except OSError:
+        os.remove(temp_path)
+        raise
+
+
+def compile_datapacks(path=None):
+    """
+    :param path: Where to write the compiled datapacks. Defaults to
+        :func:`get_compiled_path`.
+
+    Parses every registered build and writes them into a single compiled
+    datapacks file so that later loads can skip parsing the csv files. This
+    is done on first use when the file is missing or the data files have
+    changed since, calling it ahead of time spares the first load the work.
+    """
+    path = path or get_compiled_path()
+    write_compiled_builds(path, get_compiled_header(), compile_builds())
+    return path
+
+
+class LazyBuilds(Mapping):
+    """
+    :param versions: A dict mapping build versions to the expansion and
+        version of the packaged data files for that build.
+
+    A mapping of build versions to :class:`Build` datapacks. Each datapack
+    is loaded from the packaged data files the first time it is looked up
+    so that only the builds actually used are ever loaded. Datapacks are
+    taken from the compiled datapacks file, see :func:`compile_datapacks`.
+    """
+
+    def __init__(self, versions):
+        self.versions = versions
+        self._builds = dict()
+
+    def __getitem__(self, version):
+        if version not in self._builds:
+            expansion, data_version = self.versions[version]
+            build = load_compiled_build(expansion, data_version)
+            build.id = version
+            self._builds[version] = build
+        return self._builds[version]
+
+    def __iter__(self):
+        return iter(self.versions)
+
+    def __len__(self):
+        return len(self.versions)
+
+    def preload(self, *versions):
+        """
+        Loads the given build versions now, or all of them if none are given.
+        """
+        for version in versions or self.versions:
+            self[version]
+
+
+# WoL Data
+wol_builds = LazyBuilds(
+    {
+        version: ("WoL", version)
+        for version in ("16117", "17326", "18092", "19458", "22612", "24944")
+    }
+)
+
+# HotS Data
+hots_builds = LazyBuilds(
+    {version: ("HotS", version) for version in ("base", "23925", "24247", "24764")}
+)
+hots_builds.versions["38215"] = ("LotV", "base")
+
+# LotV Data
+lotv_builds = LazyBuilds(
+    {
+        version: ("LotV", version)
+        for version in (
+            "base",
+            "44401",
+            "47185",
+            "48258",
+            "53644",
+            "54724",
+            "59587",
+            "70154",
+            "76114",
+            "77379",
+            "80949",
+            "89720",
+        )
+    }
+)
 
 datapacks = builds = {"WoL": wol_builds, "HotS": hots_builds, "LotV": lotv_builds}
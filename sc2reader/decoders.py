@@ -1,7 +1,5 @@
-from io import BytesIO
-
+import mmap
 import struct
-import functools
 
 try:
     from collections import OrderedDict
@@ -11,40 +9,31 @@ except ImportError as e:
 
 class ByteDecoder:
     """
-    :param contents: The string or file-like object to decode
+    :param contents: The string, bytes-like, or file-like object to decode
     :param endian: Either > or <. Indicates the endian the bytes are stored in.
 
     Used to unpack parse byte aligned files.
     """
 
-    #: The Bytes object used internally for reading from the
-    #: decoder contents. cStringIO is faster than managing our
-    #: own string access in python. For PyPy installations a
-    #: managed string implementation might be faster.
-    _buffer = None
+    #: The string buffer being decoded. Bytes, memoryview and mmap
+    #: contents are indexed in place rather than copied into a BytesIO.
+    _contents = b""
 
-    #: The string buffer being decoded. A direct reference
-    #: is kept around to make read_range and peek faster.
-    _contents = ""
+    #: The current read position in :attr:`_contents`.
+    _pos = 0
 
     def __init__(self, contents, endian):
         """
         Accepts both strings and files implementing ``read()`` and
         decodes them in the specified endian format.
         """
-        if hasattr(contents, "read"):
+        if hasattr(contents, "read") and not isinstance(contents, mmap.mmap):
             self._contents = contents.read()
         else:
             self._contents = contents
 
-        self._buffer = BytesIO(self._contents)
         self.length = len(self._contents)
 
-        # Expose the basic BytesIO interface
-        self.read = self._buffer.read
-        self.seek = self._buffer.seek
-        self.tell = self._buffer.tell
-
         # decode the endian value if necessary
         self.endian = endian.lower()
         if self.endian.lower() == "little":
@@ -63,6 +52,36 @@ class ByteDecoder:
         self._unpack_longlong = struct.Struct(str(self.endian + "Q")).unpack
         self._unpack_bytes = lambda bytes: bytes if self.endian == ">" else bytes[::-1]
 
+    def read(self, count=-1):
+        """
+        Returns the next ``count`` bytes, or all remaining bytes if ``count`` is negative
+        """
+        start = self._pos
+        if count is None or count < 0:
+            end = self.length
+        else:
+            end = min(start + count, self.length)
+        self._pos = end
+        return bytes(self._contents[start:end])
+
+    def seek(self, offset, whence=0):
+        """
+        Moves the cursor to ``offset`` relative to the start (0), the current
+        position (1), or the end (2) of the contents
+        """
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self.length
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self):
+        """
+        Returns the current cursor position
+        """
+        return self._pos
+
     def done(self):
         """
         Returns true when all bytes have been decoded
@@ -73,20 +92,22 @@ class ByteDecoder:
         """
         Returns the raw byte string from the indicated address range
         """
-        return self._contents[start:end]
+        return bytes(self._contents[start:end])
 
     def peek(self, count):
         """
         Returns the raw byte string for the next ``count`` bytes
         """
         start = self.tell()
-        return self._contents[start : start + count]
+        return bytes(self._contents[start : start + count])
 
     def read_uint8(self):
         """
         Returns the next byte as an unsigned integer
         """
-        return ord(self.read(1))
+        byte = self._contents[self._pos]
+        self._pos += 1
+        return byte
 
     def read_uint16(self):
         """
@@ -132,103 +153,149 @@ class ByteDecoder:
         """
         Read a NULL byte terminated character string decoded with given encoding (default utf8). Ignores endian.
         """
-        cstring = BytesIO()
-        while True:
-            c = self.read(1)
-            if ord(c) == 0:
-                return cstring.getvalue().decode(encoding)
-            else:
-                cstring.write(c)
+        contents = self._contents
+        start = self._pos
+        end = start
+        while contents[end] != 0:
+            end += 1
+        self._pos = end + 1
+        return bytes(contents[start:end]).decode(encoding)
 
 
 class BitPackedDecoder:
     """
-    :param contents: The string of file-like object to decode
+    :param contents: The string, bytes-like object, or file-like object to decode
 
-    Extends :class:`ByteDecoder`. Always packed BIG_ENDIAN
+    Always packed BIG_ENDIAN
 
     Adds capabilities for parsing files that Blizzard has packed in
-    bits and not in bytes.
-
+    bits and not in bytes. Bits are consumed from the low end of each
+    byte while multi-byte values are assembled big endian.
+
+    The contents are indexed directly instead of going through a
+    :class:`ByteDecoder`; whole bytes are read with ``int.from_bytes``
+    and only the unused bits of the current byte are carried between
+    reads. Any object supporting integer indexing and slicing works,
+    so ``bytes``, ``memoryview`` and ``mmap`` contents are read in place.
     """
 
-    #: The ByteDecoder used internally to read byte
-    #: aligned values.
-    _buffer = None
+    #: The object being decoded.
+    _data = b""
 
-    #: Tracks the how many bits have already been used
-    #: from the current byte.
-    _bit_shift = 0
+    #: The number of bytes that have been (partially) consumed.
+    _used = 0
 
-    #: Holds the byte, if any, that hasn't had its bits
-    #: fully used yet.
-    _next_byte = None
+    #: The unused high bits of the most recently read byte,
+    #: already shifted down to the low end.
+    _next = 0
 
-    #: Maps bit shifts to low bit masks used for grabbing
-    #: the first bits off of the next byte.
-    _lo_masks = [0x00, 0x01, 0x03, 0x07, 0x0F, 0x1F, 0x3F, 0x7F, 0xFF]
+    #: The number of bits still available in :attr:`_next`.
+    _next_bits = 0
 
-    #: Maps bit shifts to high bit masks used for grabbing
-    #: the remaining bits off of the previous byte.
-    _hi_masks = [0xFF ^ mask for mask in _lo_masks]
-
-    #: Maps bit shifts to high and low bit masks. Used for
-    #: joining bytes when we are not byte aligned.
-    _bit_masks = list(zip(_lo_masks, _hi_masks))
+    #: Maps bit counts to low bit masks.
+    _lo_masks = [(1 << bits) - 1 for bits in range(65)]
 
     def __init__(self, contents):
-        self._buffer = ByteDecoder(contents, endian="BIG")
+        if hasattr(contents, "read") and not isinstance(contents, mmap.mmap):
+            contents = contents.read()
 
-        # Partially expose the ByteBuffer interface
-        self.length = self._buffer.length
-        self.tell = self._buffer.tell
-        self.peek = self._buffer.peek
-        self.read_range = self._buffer.read_range
+        self._data = contents
+        self.length = len(contents)
 
-        # Reduce the number of lookups required to read
-        self._read = self._buffer.read
-        self.read_bool = functools.partial(self.read_bits, 1)
+    @property
+    def _bit_shift(self):
+        """
+        The number of bits already used from the current byte
+        """
+        return (8 - self._next_bits) & 7
+
+    def tell(self):
+        """
+        Returns the number of bytes that have been (partially) read
+        """
+        return self._used
 
     def done(self):
         """
         Returns true when all bytes in the buffer have been used
         """
-        return self.tell() == self.length
+        return self._used == self.length
+
+    def read_range(self, start, end):
+        """
+        Returns the raw byte string from the indicated address range
+        """
+        return bytes(self._data[start:end])
+
+    def peek(self, count):
+        """
+        Returns the raw byte string for the next ``count`` bytes
+        """
+        return bytes(self._data[self._used : self._used + count])
 
     def byte_align(self):
         """
         Moves cursor to the beginning of the next byte
         """
-        self._next_byte = None
-        self._bit_shift = 0
+        self._next_bits = 0
+
+    def _read_word(self, count):
+        """
+        Returns the next ``count`` whole bytes as a big endian integer
+        """
+        start = self._used
+        end = start + count
+        if end > self.length:
+            raise EOFError(f"Cannot read {count} bytes at position {start}")
+        self._used = end
+        return int.from_bytes(self._data[start:end], "big")
+
+    def read_bool(self):
+        """
+        Returns the next bit as an integer
+        """
+        next_bits = self._next_bits
+        if next_bits:
+            next_byte = self._next
+            self._next = next_byte >> 1
+            self._next_bits = next_bits - 1
+            return next_byte & 1
+
+        byte = self._data[self._used]
+        self._used += 1
+        self._next = byte >> 1
+        self._next_bits = 7
+        return byte & 1
 
     def read_uint8(self):
         """
         Returns the next 8 bits as an unsigned integer
         """
-        data = ord(self._buffer.read(1))
+        byte = self._data[self._used]
+        self._used += 1
 
-        if self._bit_shift != 0:
-            lo_mask, hi_mask = self._bit_masks[self._bit_shift]
-            hi_bits = self._next_byte & hi_mask
-            lo_bits = data & lo_mask
-            self._next_byte = data
-            data = hi_bits | lo_bits
+        next_bits = self._next_bits
+        if next_bits:
+            shift = 8 - next_bits
+            data = self._next << shift | byte & self._lo_masks[shift]
+            self._next = byte >> shift
+            return data
 
-        return data
+        return byte
 
     def read_uint16(self):
         """
         Returns the next 16 bits as an unsigned integer
         """
-        data = self._buffer.read_uint16()
+        data = self._read_word(2)
 
-        if self._bit_shift != 0:
-            lo_mask, hi_mask = self._bit_masks[self._bit_shift]
-            hi_bits = (self._next_byte & hi_mask) << 8
-            mi_bits = (data & 0xFF00) >> (8 - self._bit_shift)
-            lo_bits = data & lo_mask
-            self._next_byte = data & 0xFF
+        next_bits = self._next_bits
+        if next_bits:
+            shift = 8 - next_bits
+            hi_bits = self._next << (16 - next_bits)
+            mi_bits = (data >> 8) << shift
+            lo_bits = data & self._lo_masks[shift]
+            self._next = (data & 0xFF) >> shift
             data = hi_bits | mi_bits | lo_bits
 
         return data
@@ -237,30 +304,32 @@ class BitPackedDecoder:
         """
         Returns the next 32 bits as an unsigned integer
         """
-        data = self._buffer.read_uint32()
+        data = self._read_word(4)
 
-        if self._bit_shift != 0:
-            lo_mask, hi_mask = self._bit_masks[self._bit_shift]
-            hi_bits = (self._next_byte & hi_mask) << 24
-            mi_bits = (data & 0xFFFFFF00) >> (8 - self._bit_shift)
-            lo_bits = data & lo_mask
-            self._next_byte = data & 0xFF
+        next_bits = self._next_bits
+        if next_bits:
+            shift = 8 - next_bits
+            hi_bits = self._next << (32 - next_bits)
+            mi_bits = (data >> 8) << shift
+            lo_bits = data & self._lo_masks[shift]
+            self._next = (data & 0xFF) >> shift
             data = hi_bits | mi_bits | lo_bits
 
         return data
 
     def read_uint64(self):
-        """Returns
-        the next 64 bits as an unsigned integer
         """
-        data = self._buffer.read_uint64()
+        Returns the next 64 bits as an unsigned integer
+        """
+        data = self._read_word(8)
 
-        if self._bit_shift != 0:
-            lo_mask, hi_mask = self._bit_masks[self._bit_shift]
-            hi_bits = (self._next_byte & hi_mask) << 56
-            mi_bits = (data & 0xFFFFFFFFFFFFFF00) >> (8 - self._bit_shift)
-            lo_bits = data & lo_mask
-            self._next_byte = data & 0xFF
+        next_bits = self._next_bits
+        if next_bits:
+            shift = 8 - next_bits
+            hi_bits = self._next << (64 - next_bits)
+            mi_bits = (data >> 8) << shift
+            lo_bits = data & self._lo_masks[shift]
+            self._next = (data & 0xFF) >> shift
             data = hi_bits | mi_bits | lo_bits
 
         return data
@@ -269,101 +338,79 @@ class BitPackedDecoder:
         """
         Reads a signed integer of variable length
         """
-        byte = ord(self._buffer.read(1))
+        self._next_bits = 0
+        data = self._data
+        used = self._used
+        byte = data[used]
         negative = byte & 0x01
         result = (byte & 0x7F) >> 1
         bits = 6
         while byte & 0x80:
-            byte = self.read_uint8()
+            used += 1
+            byte = data[used]
             result |= (byte & 0x7F) << bits
             bits += 7
+        self._used = used + 1
         return -result if negative else result
 
     def read_aligned_bytes(self, count):
         """
         Skips to the beginning of the next byte and returns the next ``count`` bytes as a byte string
         """
-        self.byte_align()
-        return self._buffer.read_bytes(count)
+        self._next_bits = 0
+        start = self._used
+        end = start + count
+        if end > self.length:
+            raise EOFError(f"Cannot read {count} bytes at position {start}")
+        self._used = end
+        return bytes(self._data[start:end])
 
     def read_aligned_string(self, count, encoding="utf8"):
         """
         Skips to the beginning of the next byte and returns the next ``count`` bytes decoded with encoding (default utf8)
         """
-        self.byte_align()
-        return self._buffer.read_string(count, encoding)
+        return self.read_aligned_bytes(count).decode(encoding)
 
     def read_bytes(self, count):
         """
         Returns the next ``count*8`` bits as a byte string
         """
-        data = self._buffer.read_bytes(count)
-
-        if self._bit_shift != 0:
-            temp_buffer = BytesIO()
-            prev_byte = self._next_byte
-            lo_mask, hi_mask = self._bit_masks[self._bit_shift]
-            for next_byte in struct.unpack("B" * count, data):
-                temp_buffer.write(
-                    struct.pack("B", prev_byte & hi_mask | next_byte & lo_mask)
-                )
-                prev_byte = next_byte
-
-            self._next_byte = prev_byte
-            data = temp_buffer.getvalue()
-            temp_buffer.truncate(0)
-
-        return data
+        if self._next_bits == 0:
+            return self.read_aligned_bytes(count)
+        return bytes(self.read_uint8() for i in range(count))
 
     def read_bits(self, count):
         """Returns
         the next ``count`` bits as an unsigned integer
         """
-        result = 0
-        bits = count
-        bit_shift = self._bit_shift
+        next_bits = self._next_bits
 
-        # If we've got a byte in progress use it first
-        if bit_shift != 0:
-            bits_left = 8 - bit_shift
+        # Serve the read from the byte in progress if we can
+        if count <= next_bits:
+            next_byte = self._next
+            self._next = next_byte >> count
+            self._next_bits = next_bits - count
+            return next_byte & self._lo_masks[count]
 
-            if bits_left < bits:
-                bits -= bits_left
-                result = (self._next_byte >> bit_shift) << bits
-            elif bits_left > bits:
-                self._bit_shift += bits
-                return (self._next_byte >> bit_shift) & self._lo_masks[bits]
-            else:
-                self._bit_shift = 0
-                return self._next_byte >> bit_shift
+        # Otherwise the rest of the byte in progress is the high part
+        bits = count - next_bits
+        result = self._next << bits if next_bits else 0
 
         # Then grab any additional whole bytes as needed
         if bits >= 8:
-            bytes = int(bits / 8)
-
-            if bytes == 1:
-                bits -= 8
-                result |= self._buffer.read_uint8() << bits
-
-            elif bytes == 2:
-                bits -= 16
-                result |= self._buffer.read_uint16() << bits
-
-            elif bytes == 4:
-                bits -= 32
-                result |= self._buffer.read_uint32() << bits
-
-            else:
-                for byte in struct.unpack("B" * bytes, self._read(bytes)):
-                    bits -= 8
-                    result |= byte << bits
+            result |= self._read_word(bits >> 3) << (bits & 7)
+            bits &= 7
 
         # Grab any trailing bits from the next byte
         if bits != 0:
-            self._next_byte = ord(self._read(1))
-            result |= self._next_byte & self._lo_masks[bits]
+            byte = self._data[self._used]
+            self._used += 1
+            result |= byte & self._lo_masks[bits]
+            self._next = byte >> bits
+            self._next_bits = 8 - bits
+        else:
+            self._next_bits = 0
 
-        self._bit_shift = bits
         return result
 
     def read_frames(self):
@@ -387,25 +434,30 @@ class BitPackedDecoder:
         the first byte is used as the type identifier.
         """
         self.byte_align()
-        datatype = ord(self._buffer.read(1)) if datatype is None else datatype
+        datatype = self.read_uint8() if datatype is None else datatype
 
         if datatype == 0x00:  # array
             data = [self.read_struct() for i in range(self.read_vint())]
 
         elif datatype == 0x01:  # bitarray, weird alignment requirements
             bits = self.read_vint()
-            data = self.read_bits(bits)
+            if bits < 0:
+                # Some game summaries record negative lengths here. These
+                # have always been read as a single, partially masked byte.
+                data = self.read_uint8() & self._lo_masks[bits + 9]
+            else:
+                data = self.read_bits(bits)
 
         elif datatype == 0x02:  # blob
             length = self.read_vint()
-            data = self._buffer.read_bytes(length)
+            data = self.read_aligned_bytes(length)
 
         elif datatype == 0x03:  # choice
             flag = self.read_vint()
             data = self.read_struct()
 
         elif datatype == 0x04:  # optional
-            exists = self._buffer.read_uint8() != 0
+            exists = self.read_uint8() != 0
             data = self.read_struct() if exists else None
 
         elif datatype == 0x05:  # Struct
@@ -413,13 +465,13 @@ class BitPackedDecoder:
             data = {self.read_vint(): self.read_struct() for i in range(entries)}
 
         elif datatype == 0x06:  # u8
-            data = ord(self._buffer.read(1))
+            data = self.read_uint8()
 
         elif datatype == 0x07:  # u32
-            data = self._buffer.read_bytes(4)  # self.read_uint32()
+            data = self.read_aligned_bytes(4)  # self.read_uint32()
 
         elif datatype == 0x08:  # u64
-            data = self._buffer.read_uint64()
+            data = self.read_uint64()
 
         elif datatype == 0x09:  # vint
             data = self.read_vint()
@@ -9,6 +9,7 @@ def setGameEngine(engine):
     module = sys.modules[__name__]
     module.run = engine.run
     module.plugins = engine.plugins
+    module.event_types = engine.event_types
     module.register_plugin = engine.register_plugin
     module.register_plugins = engine.register_plugins
 
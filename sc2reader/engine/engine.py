@@ -1,4 +1,7 @@
 import collections
+import time
+import tracemalloc
+
 from sc2reader.events import (
     CommandEvent,
     ControlGroupEvent,
@@ -116,14 +119,39 @@ class GameEngine:
             code, details = replay.plugins['RequiredPlugin']
             message = "RequiredPlugin failed with code: {0}. Cannot continue.".format(code)
             yield PluginExit(self, code=1, details=dict(msg=message))
+
+
+    Profiling
+    -------------------------
+
+    To find out which plugins are slowing a batch down, create the engine with
+    ``profile=True`` or set ``engine.profile``. Each run records the calls,
+    the cumulative wall time in seconds, and the net memory allocated in
+    bytes for every plugin event handler::
+
+        replay.plugin_timings['SelectionTracker']['handleSelectionEvent']
+        # {'calls': 5212, 'time': 0.0213, 'memory': 180224}
+
+    The timings of every replay run are also added up in
+    ``engine.plugin_timings``. Timings of replays run elsewhere, in worker
+    processes for instance, can be added in with :meth:`add_timings`.
+    Allocations are traced with ``tracemalloc`` which slows the handlers down
+    considerably; the engine adds no overhead when profiling is off.
     """
 
-    def __init__(self, plugins=[]):
+    def __init__(self, plugins=[], profile=False):
         self._plugins = list()
+        self.profile = profile
+        self.plugin_timings = dict()
+
+        # A map of plugin tuple => {event class => event handlers}, shared by
+        # all the replays run with the same plugins.
+        self._dispatch_tables = dict()
         self.register_plugins(*plugins)
 
     def register_plugin(self, plugin):
         self._plugins.append(plugin)
+        self._dispatch_tables.clear()
 
     def register_plugins(self, *plugins):
         for plugin in plugins:
@@ -132,15 +160,73 @@ class GameEngine:
     def plugins(self):
         return self._plugins
 
-    def run(self, replay):
-        # A map of [event.name] => event handlers in plugin registration order
-        # ranked from most generic to most specific
-        handlers = dict()
+    def event_types(self):
+        """
+        Returns the set of event classes handled by at least one of the
+        registered plugins. Only these events are run through the engine, and
+        passing them as the ``event_types`` option skips building the rest
+        while the replay is read::
+
+            replay = sc2reader.load_replay(path, event_types=engine.event_types())
+
+        The readers keep instances of the event types, so an ``Event`` or
+        ``GameEvent`` handler keeps every event or every game event.
+        """
+        event_classes = dict()
+        subclasses = [Event]
+        while subclasses:
+            event_class = subclasses.pop()
+            event_classes[event_class.__name__] = event_class
+            subclasses.extend(event_class.__subclasses__())
+
+        event_types = set()
+        for plugin in self._plugins:
+            for attr in dir(plugin):
+                if attr.startswith("handle") and attr[6:] in event_classes:
+                    event_types.add(event_classes[attr[6:]])
+        return event_types
+
+    def add_timings(self, timings):
+        """
+        Adds the ``plugin_timings`` of a replay to the totals in
+        ``engine.plugin_timings``.
+        """
+        for plugin_name, handler_timings in timings.items():
+            totals = self.plugin_timings.setdefault(plugin_name, dict())
+            for handler_name, timing in handler_timings.items():
+                total = totals.setdefault(
+                    handler_name, dict(calls=0, time=0.0, memory=0)
+                )
+                for key in ("calls", "time", "memory"):
+                    total[key] += timing[key]
 
+    def run(self, replay):
+        if not self.profile:
+            replay.plugin_timings = None
+            self._run(replay, None)
+            return
+
+        # Leave tracemalloc as we found it
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        try:
+            replay.plugin_timings = dict()
+            self._run(replay, replay.plugin_timings)
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        self.add_timings(replay.plugin_timings)
+
+    def _run(self, replay, timings):
         # Create a local copy of the plugins list. As plugins exit we can
-        # remove them from this list and regenerate event handlers.
+        # remove them from this list and switch to their event handlers.
         plugins = list(self._plugins)
 
+        # A map of [event class] => event handlers in plugin registration order
+        # ranked from most generic to most specific
+        handlers = self._get_dispatch_table(plugins)
+
         # Create a dict for storing plugin exit codes and details.
         replay.plugin_result = replay.plugins = dict()
 
@@ -148,9 +234,14 @@ class GameEngine:
         replay.plugin_failures = list()
 
         # Fill event event queue with the replay events, bookmarked by Init and End events.
+        # Events that none of the plugins handle are left out.
         event_queue = collections.deque()
         event_queue.append(InitGameEvent())
-        event_queue.extend(replay.events)
+        event_queue.extend(
+            event
+            for event in replay.events
+            if self._get_handlers(handlers, event, plugins)
+        )
         event_queue.append(EndGameEvent())
 
         # Work through the events in the queue, pushing newly emitted events to
@@ -159,19 +250,16 @@ class GameEngine:
             event = event_queue.popleft()
 
             if event.name == "PluginExit":
-                # Remove the plugin and reset the handlers.
+                # Remove the plugin and switch to the remaining handlers.
                 plugins.remove(event.plugin)
-                handlers.clear()
+                handlers = self._get_dispatch_table(plugins, handlers, event.plugin)
                 replay.plugin_result[event.plugin.name] = (event.code, event.details)
                 if event.code != 0:
                     replay.plugin_failures.append(event.plugin.name)
 
-            # If we haven't compiled a list of handlers for this event yet, do so!
-            if event.name not in handlers:
-                event_handlers = self._get_event_handlers(event, plugins)
-                handlers[event.name] = event_handlers
-            else:
-                event_handlers = handlers[event.name]
+            event_handlers = self._get_handlers(handlers, event, plugins)
+            if not event_handlers:
+                continue
 
             # Events have the option of yielding one or more additional events
             # which get processed after the current event finishes. The new_events
@@ -179,6 +267,9 @@ class GameEngine:
             # the order again with a series of appendlefts.
             new_events = collections.deque()
             for event_handler in event_handlers:
+                if timings is not None:
+                    start = time.perf_counter()
+                    memory = tracemalloc.get_traced_memory()[0]
                 try:
                     for new_event in event_handler(event, replay) or []:
                         if new_event.name == "PluginExit":
@@ -195,6 +286,8 @@ class GameEngine:
                             event_handler.__self__, code=1, details=dict(error=e)
                         )
                         new_events.append(new_event)
+                if timings is not None:
+                    self._record_timing(timings, event_handler, start, memory)
             event_queue.extendleft(new_events)
 
         # For any plugins that didn't yield a PluginExit event or throw unexpected exceptions,
@@ -202,10 +295,47 @@ class GameEngine:
         for plugin in plugins:
             replay.plugin_result[plugin.name] = (0, dict())
 
-    def _get_event_handlers(self, event, plugins):
-        return sum(
-            (self._get_plugin_event_handlers(plugin, event) for plugin in plugins), []
+    def _record_timing(self, timings, event_handler, start, memory):
+        elapsed = time.perf_counter() - start
+        allocated = tracemalloc.get_traced_memory()[0] - memory
+        handler_timings = timings.setdefault(event_handler.__self__.name, dict())
+        timing = handler_timings.setdefault(
+            event_handler.__name__, dict(calls=0, time=0.0, memory=0)
         )
+        timing["calls"] += 1
+        timing["time"] += elapsed
+        timing["memory"] += allocated
+
+    def _get_dispatch_table(self, plugins, previous=None, removed=None):
+        # Tables are filled in as new event classes are seen. The table for
+        # the plugins left after one exits starts from the previous table
+        # without the handlers of the exiting plugin.
+        key = tuple(plugins)
+        if key not in self._dispatch_tables:
+            table = dict()
+            if previous is not None and removed not in plugins:
+                for event_class, event_handlers in previous.items():
+                    table[event_class] = [
+                        handler
+                        for handler in event_handlers
+                        if getattr(handler, "__self__", None) is not removed
+                    ]
+            self._dispatch_tables[key] = table
+        return self._dispatch_tables[key]
+
+    def _get_handlers(self, handlers, event, plugins):
+        # If we haven't compiled a list of handlers for this event yet, do so!
+        event_handlers = handlers.get(event.__class__)
+        if event_handlers is None:
+            event_handlers = self._get_event_handlers(event, plugins)
+            handlers[event.__class__] = event_handlers
+        return event_handlers
+
+    def _get_event_handlers(self, event, plugins):
+        handlers = list()
+        for plugin in plugins:
+            handlers.extend(self._get_plugin_event_handlers(plugin, event))
+        return handlers
 
     def _get_plugin_event_handlers(self, plugin, event):
         handlers = list()
@@ -12,6 +12,16 @@ class ContextLoader:
         replay.units = set()
         replay.unit = dict()
 
+        # Replays loaded further with Replay.load are run through the engine
+        # again, so start over instead of adding to the previous run.
+        replay.objects = dict()
+        replay.active_units = dict()
+        for entity in replay.entities:
+            entity.events = list()
+            if not entity.is_observer:
+                entity.units = list()
+                entity.killed_units = list()
+
         # keep track of last TargetUnitCommandEvent for UpdateTargetUnitCommandEvent
         self.last_target_ability_event = {}
 
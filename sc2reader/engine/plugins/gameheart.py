@@ -70,14 +70,8 @@ class GameHeartNormalizer:
         )
 
     def fix_events(self, replay, start_frame):
-        # Set back the game clock for all events
-        for event in replay.events:
-            if event.frame < start_frame:
-                event.frame = 0
-                event.second = 0
-            else:
-                event.frame -= start_frame
-                event.second = event.frame >> 4
+        # Set back the game clock for all events, and for any loaded later
+        replay.offset_events(start_frame)
 
     def fix_entities(self, replay, actual_players):
         # Change the players that aren't playing into observers
@@ -1,3 +1,4 @@
+from array import array
 import functools
 
 from sc2reader.events.base import Event
@@ -22,6 +23,20 @@ class TrackerEvent(Event):
         #: Short cut string for event class name
         self.name = self.__class__.__name__
 
+    def __getattr__(self, name):
+        # Events viewed from a TrackerTable fill in the rest of their
+        # attributes from the table the first time one of them is needed.
+        table = self.__dict__.pop("_table", None)
+        if table is None:
+            raise AttributeError(
+                f"{self.__class__.__name__!r} object has no attribute {name!r}"
+            )
+
+        event = table.build_event(self.__class__, self.__dict__.pop("_row"))
+        for key, value in event.__dict__.items():
+            self.__dict__.setdefault(key, value)
+        return getattr(self, name)
+
     def load_context(self, replay):
         pass
 
@@ -632,3 +647,267 @@ class UnitPositionsEvent(TrackerEvent):
 
     def __str__(self):
         return self._str_prefix() + "Unit positions update"
+
+
+#: The names of the ``PlayerStatsEvent.stats`` values, in order
+PLAYER_STATS_FIELDS = [
+    "minerals_current",
+    "vespene_current",
+    "minerals_collection_rate",
+    "vespene_collection_rate",
+    "workers_active_count",
+    "minerals_used_in_progress_army",
+    "minerals_used_in_progress_economy",
+    "minerals_used_in_progress_technology",
+    "vespene_used_in_progress_army",
+    "vespene_used_in_progress_economy",
+    "vespene_used_in_progress_technology",
+    "minerals_used_current_army",
+    "minerals_used_current_economy",
+    "minerals_used_current_technology",
+    "vespene_used_current_army",
+    "vespene_used_current_economy",
+    "vespene_used_current_technology",
+    "minerals_lost_army",
+    "minerals_lost_economy",
+    "minerals_lost_technology",
+    "vespene_lost_army",
+    "vespene_lost_economy",
+    "vespene_lost_technology",
+    "minerals_killed_army",
+    "minerals_killed_economy",
+    "minerals_killed_technology",
+    "vespene_killed_army",
+    "vespene_killed_economy",
+    "vespene_killed_technology",
+    "food_used",
+    "food_made",
+    "minerals_used_active_forces",
+    "vespene_used_active_forces",
+    "ff_minerals_lost_army",
+    "ff_minerals_lost_economy",
+    "ff_minerals_lost_technology",
+    "ff_vespene_lost_army",
+    "ff_vespene_lost_economy",
+    "ff_vespene_lost_technology",
+]
+
+
+class TrackerTable:
+    """
+    Column oriented storage for the tracker events of a replay, filled in by
+    the tracker events reader when the ``tracker_table`` option is set.
+
+    Player stats and unit events are stored as one signed 64 bit
+    :class:`array.array` per attribute in :attr:`columns`. The other, rarer,
+    tracker events are stored as regular event objects. Missing values are
+    stored as -1 and the stats are stored as raw ``PlayerStatsEvent.stats``
+    values, so they aren't clamped and food is in 1/4096ths.
+
+    :attr:`events` holds every tracker event in order as usual. The ones
+    stored in columns are light views that only build the rest of their
+    attributes when one of them is first used.
+    """
+
+    #: The columns stored for each event name
+    COLUMNS = {
+        "PlayerStatsEvent": ["frame", "pid"] + PLAYER_STATS_FIELDS,
+        "UnitBornEvent": [
+            "frame",
+            "unit_id",
+            "unit_type",
+            "control_pid",
+            "upkeep_pid",
+            "x",
+            "y",
+        ],
+        "UnitInitEvent": [
+            "frame",
+            "unit_id",
+            "unit_type",
+            "control_pid",
+            "upkeep_pid",
+            "x",
+            "y",
+        ],
+        "UnitDoneEvent": ["frame", "unit_id"],
+        "UnitDiedEvent": [
+            "frame",
+            "unit_id",
+            "killing_player_id",
+            "killing_unit_index",
+            "killing_unit_recycle",
+            "x",
+            "y",
+        ],
+        "UnitOwnerChangeEvent": ["frame", "unit_id", "control_pid", "upkeep_pid"],
+        "UnitTypeChangeEvent": ["frame", "unit_id", "unit_type"],
+    }
+
+    def __init__(self, build):
+        #: The build of the replay, used to build events from the columns
+        self.build = build
+
+        #: A dict of event name => column name => array of values
+        self.columns = {
+            name: {column: array("q") for column in columns}
+            for name, columns in self.COLUMNS.items()
+        }
+
+        #: The unit type names referenced by the unit_type columns
+        self.unit_type_names = list()
+
+        #: The number of stats in the ``PlayerStatsEvent.stats`` of this build
+        self.stats_length = 0
+
+        #: Every tracker event in order, see above
+        self.events = list()
+
+        self._unit_types = dict()
+        self._append_rows = {
+            PlayerStatsEvent: self._append_player_stats,
+            UnitBornEvent: self._append_unit_born,
+            UnitInitEvent: self._append_unit_born,
+            UnitDoneEvent: self._append_unit_done,
+            UnitDiedEvent: self._append_unit_died,
+            UnitOwnerChangeEvent: self._append_unit_owner_change,
+            UnitTypeChangeEvent: self._append_unit_type_change,
+        }
+
+    def __len__(self):
+        return len(self.events)
+
+    def append(self, event_class, frames, data):
+        """
+        Adds an event straight from the decoded event data. Events without
+        columns are built as usual.
+        """
+        append_row = self._append_rows.get(event_class, None)
+        if append_row is None:
+            self.events.append(event_class(frames, data, self.build))
+            return
+
+        columns = self.columns[event_class.__name__]
+        frame = frames % 2**32
+        event = event_class.__new__(event_class)
+        event.frame = frame
+        event.second = frame >> 4
+        event.name = event_class.__name__
+        event._table = self
+        event._row = len(columns["frame"])
+        self.events.append(event)
+
+        columns["frame"].append(frame)
+        append_row(columns, data)
+
+    def build_event(self, event_class, row):
+        """
+        Returns a full event built from the given row of the table.
+        """
+        name = event_class.__name__
+        columns = self.columns[name]
+        frame = columns["frame"][row]
+        if event_class is PlayerStatsEvent:
+            stats = [columns[field][row] for field in PLAYER_STATS_FIELDS]
+            data = {
+                0: columns["pid"][row],
+                1: dict(enumerate(stats[: self.stats_length])),
+            }
+
+        else:
+            unit_id = columns["unit_id"][row]
+            data = {0: unit_id >> 18, 1: unit_id & 0x3FFFF}
+            if event_class in (UnitBornEvent, UnitInitEvent):
+                x, y = self._unscale(columns["x"][row], columns["y"][row])
+                data[2] = self.unit_type_names[columns["unit_type"][row]].encode("utf8")
+                data[3] = columns["control_pid"][row]
+                data[4] = columns["upkeep_pid"][row]
+                data[5], data[6] = x, y
+
+            elif event_class is UnitDiedEvent:
+                x, y = self._unscale(columns["x"][row], columns["y"][row])
+                data[2] = self._none(columns["killing_player_id"][row])
+                data[3], data[4] = x, y
+                if self.build >= 27950:
+                    data[5] = self._none(columns["killing_unit_index"][row])
+                    data[6] = self._none(columns["killing_unit_recycle"][row])
+
+            elif event_class is UnitOwnerChangeEvent:
+                data[2] = columns["control_pid"][row]
+                data[3] = columns["upkeep_pid"][row]
+
+            elif event_class is UnitTypeChangeEvent:
+                data[2] = self.unit_type_names[columns["unit_type"][row]].encode("utf8")
+
+        return event_class(frame, data, self.build)
+
+    def to_numpy(self):
+        """
+        Returns the columns as a dict of event name => column name => NumPy
+        array. The arrays share memory with the table instead of copying it.
+        """
+        import numpy
+
+        return {
+            name: {
+                column: numpy.frombuffer(values, dtype=numpy.int64)
+                for column, values in columns.items()
+            }
+            for name, columns in self.columns.items()
+        }
+
+    def _append_player_stats(self, columns, data):
+        stats = data[1]
+        self.stats_length = max(self.stats_length, len(stats))
+        columns["pid"].append(data[0])
+        for index, field in enumerate(PLAYER_STATS_FIELDS):
+            columns[field].append(stats.get(index, 0))
+
+    def _append_unit_born(self, columns, data):
+        x, y = self._scale(data[5], data[6])
+        columns["unit_id"].append(data[0] << 18 | data[1])
+        columns["unit_type"].append(self._unit_type(data[2]))
+        columns["control_pid"].append(data[3])
+        columns["upkeep_pid"].append(data[4])
+        columns["x"].append(x)
+        columns["y"].append(y)
+
+    def _append_unit_done(self, columns, data):
+        columns["unit_id"].append(data[0] << 18 | data[1])
+
+    def _append_unit_died(self, columns, data):
+        x, y = self._scale(data[3], data[4])
+        columns["unit_id"].append(data[0] << 18 | data[1])
+        columns["killing_player_id"].append(self._missing(data[2]))
+        columns["killing_unit_index"].append(self._missing(data.get(5, None)))
+        columns["killing_unit_recycle"].append(self._missing(data.get(6, None)))
+        columns["x"].append(x)
+        columns["y"].append(y)
+
+    def _append_unit_owner_change(self, columns, data):
+        columns["unit_id"].append(data[0] << 18 | data[1])
+        columns["control_pid"].append(data[2])
+        columns["upkeep_pid"].append(data[3])
+
+    def _append_unit_type_change(self, columns, data):
+        columns["unit_id"].append(data[0] << 18 | data[1])
+        columns["unit_type"].append(self._unit_type(data[2]))
+
+    def _unit_type(self, unit_type_name):
+        if unit_type_name not in self._unit_types:
+            self._unit_types[unit_type_name] = len(self.unit_type_names)
+            self.unit_type_names.append(unit_type_name.decode("utf8"))
+        return self._unit_types[unit_type_name]
+
+    def _scale(self, x, y):
+        # Coordinates only had 4 point resolution prior to Starcraft Patch 2.1
+        return (x * 4, y * 4) if self.build < 27950 else (x, y)
+
+    def _unscale(self, x, y):
+        return (x // 4, y // 4) if self.build < 27950 else (x, y)
+
+    def _missing(self, value):
+        return -1 if value is None else value
+
+    def _none(self, value):
+        return None if value == -1 else value
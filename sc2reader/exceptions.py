@@ -30,6 +30,13 @@ class ReadError(SC2ReaderError):
     def __str__(self):
         return f"{self.msg}, Type: {self.type}"
 
+    def __reduce__(self):
+        # The replay and buffer are left behind when sent to other processes
+        return (
+            self.__class__,
+            (self.msg, self.type, self.location, None, list(self.game_events)),
+        )
+
 
 class ParseError(SC2ReaderError):
     pass
@@ -41,3 +48,18 @@ class ProcessError(SC2ReaderError):
 
 class FileError(SC2ReaderError):
     pass
+
+
+class LoadError(SC2ReaderError):
+    """
+    Yielded in place of a resource that failed to load in a worker process.
+    The exception raised while loading ``source`` is available as ``error``.
+    """
+
+    def __init__(self, source, error):
+        self.source = source
+        self.error = error
+        super().__init__(source, error)
+
+    def __str__(self):
+        return f"Unable to load {self.source}: {self.error!r}"
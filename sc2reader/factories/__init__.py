@@ -2,3 +2,4 @@ from sc2reader.factories.sc2factory import SC2Factory
 from sc2reader.factories.sc2factory import FileCachedSC2Factory
 from sc2reader.factories.sc2factory import DictCachedSC2Factory
 from sc2reader.factories.sc2factory import DoubleCachedSC2Factory
+from sc2reader.factories.sc2factory import ParseCachedSC2Factory
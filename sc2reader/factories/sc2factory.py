@@ -1,7 +1,17 @@
-from collections import defaultdict
+import asyncio
+from collections import defaultdict, deque
+import concurrent.futures
+import functools
 from io import BytesIO
+import gc
+import hashlib
+import itertools
+import mmap
 import os
+import pickle
 import sys
+import tempfile
+import zlib
 
 try:
     unicode
@@ -18,9 +28,12 @@ else:
 import re
 import time
 
+import sc2reader
 from sc2reader import utils
 from sc2reader import log_utils
+from sc2reader.exceptions import LoadError, SC2ReaderError
 from sc2reader.resources import Resource, Replay, Map, GameSummary, Localization
+from sc2reader.resources import probe_replay as probe_replay_file
 
 
 @log_utils.loggable
@@ -33,9 +46,18 @@ class SC2Factory:
 
         * :meth:`load_replay` - :class:`Replay`
         * :meth:`load_replays` - generator<:class:`Replay`>
+        * :meth:`iter_events` - generator<:class:`~sc2reader.events.base.Event`>
+        * :meth:`map_replays` - generator<result of ``fn(replay)``>
+        * :meth:`reduce_replays` - combined result of ``fn(replay)``
+        * :meth:`probe_replay` - :class:`~sc2reader.objects.ReplayProbe`
+        * :meth:`probe_replays` - generator<:class:`~sc2reader.objects.ReplayProbe`>
         * :meth:`load_map` - :class:`Map`
         * :meth:`load_maps` - : generator<:class:`Map`>
 
+    Replays and maps can also be loaded from asyncio code without blocking
+    the event loop with :meth:`aload_replay`, :meth:`aload_replays`,
+    :meth:`aload_map`, and :meth:`aload_maps`.
+
     The load behavior can be configured in three ways:
 
         * Passing options to the factory constructor
@@ -48,7 +70,8 @@ class SC2Factory:
     Resources can be loaded in the singular context from the following inputs:
 
     * URLs - Uses the built-in package ``urllib``
-    * File path - Uses the built-in method ``open``
+    * File path - Uses the built-in method ``open``, or ``mmap`` with the ``memory_map`` option,
+      or reads only the parts of the file needed with the ``file_backed`` option
     * File-like object - Must implement ``.read()``
     * DepotFiles - Describes remote Battle.net depot resources
 
@@ -84,14 +107,138 @@ class SC2Factory:
         """
         return self.load(Replay, source, options, **new_options)
 
-    def load_replays(self, sources, options=None, **new_options):
+    def load_replays(
+        self,
+        sources,
+        options=None,
+        workers=None,
+        ordered=False,
+        chunksize=1,
+        **new_options,
+    ):
         """
         Loads a collection of sc2replay files, returns a generator.
+
+        With ``workers`` the replays are loaded in that many processes, see
+        :meth:`load_all_parallel`.
         """
+        if workers:
+            return self.load_all_parallel(
+                Replay,
+                sources,
+                options,
+                workers=workers,
+                ordered=ordered,
+                chunksize=chunksize,
+                extension="SC2Replay",
+                **new_options,
+            )
+
         return self.load_all(
             Replay, sources, options, extension="SC2Replay", **new_options
         )
 
+    def map_replays(
+        self,
+        sources,
+        fn,
+        options=None,
+        workers=None,
+        ordered=False,
+        chunksize=1,
+        **new_options,
+    ):
+        """
+        Loads a collection of sc2replay files and yields ``fn(replay)`` for
+        each, returns a generator.
+
+        With ``workers``, ``fn`` is called in the worker processes and only
+        its result is sent back, see :meth:`load_all_parallel`. ``fn`` must
+        be picklable, a module level function for instance. To run a set of
+        engine plugins in the workers pass them in with the ``engine`` option.
+
+        Errors raised by ``fn`` are raised from the generator either way.
+        Replays that fail to load raise without ``workers``, but with them
+        are yielded as :class:`~sc2reader.exceptions.LoadError` instead.
+        """
+        if workers:
+            return self.load_all_parallel(
+                Replay,
+                sources,
+                options,
+                workers=workers,
+                ordered=ordered,
+                chunksize=chunksize,
+                fn=fn,
+                extension="SC2Replay",
+                **new_options,
+            )
+
+        replays = self.load_all(
+            Replay, sources, options, extension="SC2Replay", **new_options
+        )
+        return map(fn, replays)
+
+    def reduce_replays(
+        self, sources, fn, reducer, initial, options=None, workers=None, **new_options
+    ):
+        """
+        Combines the results of :meth:`map_replays` with
+        ``reducer(result, fn(replay))``, starting from ``initial``. The
+        results are combined as they arrive so they are never all held at
+        once. Replays that fail to load in a worker are logged and skipped.
+        """
+        result = initial
+        for value in self.map_replays(
+            sources, fn, options, workers=workers, **new_options
+        ):
+            if isinstance(value, LoadError):
+                self.logger.warning(str(value))
+            else:
+                result = reducer(result, value)
+        return result
+
+    def iter_events(
+        self, source, kinds=("game", "tracker", "message"), options=None, **new_options
+    ):
+        """
+        Streams the events of a single sc2replay file in frame order without
+        holding them all in memory. Accepts file path, url, or file object.
+        See :meth:`~sc2reader.resources.Replay.iter_events`.
+        """
+        options = dict(options or self._get_options(Replay, **new_options))
+        options.update(load_level=1, engine=None)
+        return self.load(Replay, source, options).iter_events(kinds)
+
+    def probe_replay(self, source, options=None, **new_options):
+        """
+        Reads the build, length, map, and players of a single sc2replay file
+        without loading it, see :func:`~sc2reader.resources.probe_replay`.
+        Accepts file path, url, or file object. Local files are read in
+        place so only the parts of the file needed are read.
+        """
+        options = options or self._get_options(Replay, **new_options)
+        if isinstance(source, basestring) and not re.match(r"https?://", source):
+            location = os.path.join(options.get("directory", ""), source)
+            return probe_replay_file(location)
+
+        resource, filename = self._load_resource(source, options=options)
+        return probe_replay_file(resource, filename)
+
+    def probe_replays(self, sources, options=None, **new_options):
+        """
+        Probes a collection of sc2replay files, returns a generator. See
+        :meth:`probe_replay`.
+        """
+        options = options or self._get_options(
+            Replay, extension="SC2Replay", **new_options
+        )
+        if isinstance(sources, basestring):
+            sources = utils.get_files(sources, **options)
+
+        for source in sources:
+            yield self.probe_replay(source, options)
+
     def load_localization(self, source, options=None, **new_options):
         """
         Loads a single s2ml file. Accepts file path, url, or file object.
@@ -118,6 +265,68 @@ class SC2Factory:
         """
         return self.load_all(Map, sources, options, extension="s2ma", **new_options)
 
+    async def aload_replay(self, source, options=None, executor=None, **new_options):
+        """
+        Loads a single sc2replay file without blocking the event loop, see
+        :meth:`aload`.
+        """
+        return await self.aload(Replay, source, options, executor, **new_options)
+
+    def aload_replays(
+        self,
+        sources,
+        options=None,
+        concurrency=4,
+        ordered=False,
+        executor=None,
+        **new_options,
+    ):
+        """
+        Loads a collection of sc2replay files without blocking the event
+        loop, returns an async generator. See :meth:`aload_all`.
+        """
+        return self.aload_all(
+            Replay,
+            sources,
+            options,
+            concurrency=concurrency,
+            ordered=ordered,
+            executor=executor,
+            extension="SC2Replay",
+            **new_options,
+        )
+
+    async def aload_map(self, source, options=None, executor=None, **new_options):
+        """
+        Loads a single s2ma file without blocking the event loop, see
+        :meth:`aload`.
+        """
+        return await self.aload(Map, source, options, executor, **new_options)
+
+    def aload_maps(
+        self,
+        sources,
+        options=None,
+        concurrency=4,
+        ordered=False,
+        executor=None,
+        **new_options,
+    ):
+        """
+        Loads a collection of s2ma files without blocking the event loop,
+        returns an async generator. See :meth:`aload_all`.
+        """
+        return self.aload_all(
+            Map,
+            sources,
+            options,
+            concurrency=concurrency,
+            ordered=ordered,
+            executor=executor,
+            extension="s2ma",
+            **new_options,
+        )
+
     def load_game_summary(self, source, options=None, **new_options):
         """
         Loads a single s2gs file. Accepts file path, url, or file object.
@@ -167,6 +376,139 @@ class SC2Factory:
         for resource, filename in self._load_resources(sources, options=options):
             yield self._load(cls, resource, filename=filename, options=options)
 
+    def load_all_parallel(
+        self,
+        cls,
+        sources,
+        options=None,
+        workers=None,
+        ordered=False,
+        chunksize=1,
+        fn=None,
+        **new_options,
+    ):
+        """
+        Loads a collection of resources in a pool of ``workers`` processes
+        and yields them as they finish, or in the order of ``sources`` if
+        ``ordered`` is set. Sources are sent to the workers ``chunksize`` at
+        a time and only a few chunks are queued ahead, so directories are
+        walked as the pool works through them.
+
+        This factory and the load options are sent to each worker once, the
+        factory plugins run in the workers. Sources that fail to load are
+        yielded as :class:`~sc2reader.exceptions.LoadError` instead of
+        raising so the rest of the collection still gets loaded.
+
+        If ``fn`` is given it is called on each resource in the worker and
+        its result is yielded instead of the resource. Errors raised by
+        ``fn`` aren't wrapped, they are raised from the generator as they
+        would be if ``fn`` had been called on the loaded resources here.
+        """
+        options = options or self._get_options(cls, **new_options)
+
+        # Path to a folder, retrieve all relevant files as the collection
+        if isinstance(sources, basestring):
+            sources = utils.get_files(sources, **options)
+
+        sources = iter(sources)
+        chunks = iter(lambda: list(itertools.islice(sources, chunksize)), [])
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self, options),
+        ) as executor:
+            pending = deque()
+            for chunk in itertools.islice(chunks, workers * 2):
+                pending.append(executor.submit(_load_chunk, cls, chunk, fn))
+
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        pending.remove(future)
+
+                # Keep the pool busy before handing results back
+                for chunk in itertools.islice(chunks, len(done)):
+                    pending.append(executor.submit(_load_chunk, cls, chunk, fn))
+
+                for future in done:
+                    yield from future.result()
+
+    async def aload(self, cls, source, options=None, executor=None, **new_options):
+        """
+        Loads a single resource without blocking the event loop. Fetching
+        the resource and parsing it are run as separate steps in
+        ``executor``, the default executor of the running loop if not given,
+        so downloads and disk reads overlap with the parsing of other
+        resources.
+        """
+        loop = asyncio.get_running_loop()
+        options = options or self._get_options(cls, **new_options)
+        resource, filename = await loop.run_in_executor(
+            executor, functools.partial(self._load_resource, source, options=options)
+        )
+        return await loop.run_in_executor(
+            executor, functools.partial(self._load, cls, resource, filename, options)
+        )
+
+    async def aload_all(
+        self,
+        cls,
+        sources,
+        options=None,
+        concurrency=4,
+        ordered=False,
+        executor=None,
+        **new_options,
+    ):
+        """
+        Loads a collection of resources with :meth:`aload`, at most
+        ``concurrency`` at a time, and yields them as they finish or in the
+        order of ``sources`` if ``ordered`` is set. Loads still running when
+        the generator is closed are cancelled.
+        """
+        options = options or self._get_options(cls, **new_options)
+
+        # Path to a folder, retrieve all relevant files as the collection
+        if isinstance(sources, basestring):
+            sources = utils.get_files(sources, **options)
+
+        sources = iter(sources)
+        pending = deque(
+            asyncio.ensure_future(self.aload(cls, source, options, executor))
+            for source in itertools.islice(sources, concurrency)
+        )
+        try:
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                    await asyncio.wait(done)
+                else:
+                    done, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        pending.remove(task)
+
+                # Start the next loads before handing results back
+                for source in itertools.islice(sources, len(done)):
+                    pending.append(
+                        asyncio.ensure_future(
+                            self.aload(cls, source, options, executor)
+                        )
+                    )
+
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
     # Internal Functions
     def _load(self, cls, resource, filename, options):
         obj = cls(resource, filename=filename, factory=self, **options)
@@ -207,8 +549,21 @@ class SC2Factory:
         return urlopen(resource).read()
 
     def load_local_resource_contents(self, location, **options):
+        # The file is kept open and only the archive header, tables, and
+        # members used are read from it.
+        if options.get("file_backed", False):
+            return utils.PositionalFile(location)
+
         # Extract the contents so we can close the file
         with open(location, "rb") as resource_file:
+            if options.get("memory_map", False):
+                # The mapping outlives the file handle and is only paged
+                # in as the archive members are actually read.
+                try:
+                    return mmap.mmap(resource_file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    pass  # Empty files can't be mapped
+
             return resource_file.read()
 
     def _load_resource(self, resource, options=None, **new_options):
@@ -229,9 +584,13 @@ class SC2Factory:
                 location = os.path.join(directory, resource)
                 contents = self.load_local_resource_contents(location, **options)
 
-            # BytesIO implements a fuller file-like object
+            # BytesIO implements a fuller file-like object, memory maps and
+            # positional files already provide one and are read in place.
             resource_name = resource
-            resource = BytesIO(contents)
+            if isinstance(contents, (mmap.mmap, utils.PositionalFile)):
+                resource = contents
+            else:
+                resource = BytesIO(contents)
 
         else:
             # Totally not designed for large files!!
@@ -247,6 +606,37 @@ class SC2Factory:
         return (resource, resource_name)
 
 
+# The factory and options used by each worker process of load_all_parallel
+_worker_factory = None
+_worker_options = None
+
+
+def _init_worker(factory, options):
+    global _worker_factory, _worker_options
+    _worker_factory = factory
+    _worker_options = options
+
+
+def _load_chunk(cls, sources, fn=None):
+    results = list()
+    for source in sources:
+        try:
+            resource = _worker_factory.load(cls, source, dict(_worker_options))
+        except Exception as e:
+            error = LoadError(source, e)
+            try:
+                pickle.loads(pickle.dumps(error))
+            except Exception:
+                # Not every exception survives the trip back to the parent
+                error = LoadError(source, SC2ReaderError(repr(e)))
+            results.append(error)
+            continue
+
+        # Errors from fn are the caller's and are raised in the parent
+        results.append(fn(resource) if fn else resource)
+    return results
+
+
 class CachedSC2Factory(SC2Factory):
     def get_remote_cache_key(self, remote_resource):
         # Strip the port and use the domain as the bucket
@@ -379,3 +769,127 @@ class DoubleCachedSC2Factory(DictCachedSC2Factory, FileCachedSC2Factory):
 
         DictCachedSC2Factory.cache_set(self, cache_key, resource)
         return resource
+
+
+class ParseCachedSC2Factory(SC2Factory):
+    """
+    :param cache_dir: Local directory to cache parsed replays in.
+
+    Extends :class:`SC2Factory`.
+
+    Caches the decoded ``raw_data`` of replays on the file system in the
+    ``cache_dir``, keyed by the replay file hash, the sc2reader and cache
+    versions, the load level, and the options that change what is decoded.
+    Later loads of the same replay skip extracting and decoding the archive
+    members; only the engine and plugins are run again.
+
+    Readers registered on individual replays are not part of the cache key,
+    clear the cache directory after changing them.
+    """
+
+    #: Options that change what gets decoded, these are part of the cache key
+    parse_cache_options = [
+        "debug",
+        "do_tracker_events",
+        "event_types",
+        "max_frame",
+        "tracker_table",
+        "until_second",
+    ]
+
+    #: The version of the cached entries, part of the cache key. Bumped when
+    #: the cache key or what gets cached changes so old entries aren't used.
+    parse_cache_version = 2
+
+    def __init__(self, cache_dir, **options):
+        super().__init__(**options)
+        self.cache_dir = os.path.abspath(cache_dir)
+        if not os.path.isdir(self.cache_dir):
+            raise ValueError(
+                f"cache_dir ({self.cache_dir}) must be an existing directory."
+            )
+        elif not os.access(self.cache_dir, os.F_OK | os.W_OK | os.R_OK):
+            raise ValueError(
+                "Must have read/write access to {} for parse caching.".format(
+                    self.cache_dir
+                )
+            )
+
+    def _load(self, cls, resource, filename, options):
+        if not issubclass(cls, Replay):
+            return super()._load(cls, resource, filename, options)
+
+        filehash = options.get("filehash", None) or utils.get_file_hash(
+            resource, options.get("hash_algorithm", "sha256")
+        )
+        cache_key = self.get_parse_cache_key(filehash, options)
+        resource.seek(0)
+        raw_data = self.cache_get(cache_key) if self.cache_has(cache_key) else None
+
+        # The engine attaches players and units to the decoded events so the
+        # raw data has to be cached before it runs. All of it is cached, so
+        # the replay isn't loaded lazily.
+        replay_options = dict(
+            options, engine=None, raw_data=raw_data, filehash=filehash, lazy=False
+        )
+        replay = cls(resource, filename=filename, factory=self, **replay_options)
+        if raw_data is None:
+            self.cache_set(cache_key, replay.raw_data)
+
+        replay._run_engine(options.get("engine", sc2reader.engine))
+        for plugin in options.get("plugins", self._get_plugins(cls)):
+            replay = plugin(replay)
+        return replay
+
+    def get_parse_cache_key(self, filehash, options):
+        decode_options = list()
+        for name in self.parse_cache_options:
+            value = options.get(name, None)
+            if name == "event_types" and value:
+                value = sorted(f"{cls.__module__}.{cls.__name__}" for cls in value)
+            decode_options.append(f"{name}={value!r}")
+
+        options_hash = hashlib.sha1(";".join(decode_options).encode("utf8"))
+        return (
+            filehash,
+            sc2reader.__version__,
+            self.parse_cache_version,
+            options.get("load_level", 4),
+            options_hash.hexdigest()[:12],
+        )
+
+    def cache_has(self, cache_key):
+        return os.path.exists(self.cache_path(cache_key))
+
+    def cache_get(self, cache_key):
+        with open(self.cache_path(cache_key), "rb") as cache_file:
+            contents = zlib.decompress(cache_file.read())
+
+        # Unpickling builds many small objects none of which are garbage,
+        # collection passes while doing so are wasted time.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return pickle.loads(contents)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def cache_set(self, cache_key, raw_data):
+        cache_path = self.cache_path(cache_key)
+        bucket_dir = os.path.dirname(cache_path)
+        os.makedirs(bucket_dir, exist_ok=True)
+
+        # Write to a temporary file first so that concurrent loads never
+        # see a partially written entry.
+        contents = zlib.compress(pickle.dumps(raw_data, pickle.HIGHEST_PROTOCOL), 1)
+        fd, temp_path = tempfile.mkstemp(dir=bucket_dir)
+        with os.fdopen(fd, "wb") as out:
+            out.write(contents)
+        os.replace(temp_path, cache_path)
+
+    def cache_path(self, cache_key):
+        filehash = cache_key[0]
+        return os.path.join(
+            self.cache_dir, filehash[:2], "-".join(map(str, cache_key)) + ".pickle"
+        )
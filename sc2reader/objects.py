@@ -458,6 +458,27 @@ BuildEntry = namedtuple(
     "BuildEntry", ["supply", "total_supply", "time", "order", "build_index"]
 )
 
+#: The header and details of a replay as read by :func:`sc2reader.probe`.
+#: ``players``, ``races``, ``results``, and ``teams`` hold the name, played
+#: race, result ("Win", "Loss", or None), and team number of each player.
+ReplayProbe = namedtuple(
+    "ReplayProbe",
+    [
+        "filename",
+        "release_string",
+        "build",
+        "base_build",
+        "frames",
+        "length",
+        "map_name",
+        "players",
+        "races",
+        "results",
+        "teams",
+        "unix_timestamp",
+    ],
+)
+
 
 # TODO: Are there libraries with classes like this in them
 class Graph:
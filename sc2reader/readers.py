@@ -1,10 +1,13 @@
+import collections
 import struct
 
 from sc2reader.exceptions import ParseError, ReadError
 from sc2reader.objects import Attribute
 from sc2reader.events.game import (
     CameraEvent,
+    CommandEvent,
     CommandManagerStateEvent,
+    ControlGroupEvent,
     HijackReplayGameEvent,
     PlayerLeaveEvent,
     ResourceTradeEvent,
@@ -15,8 +18,14 @@ from sc2reader.events.game import (
     create_command_event,
     create_control_group_event,
 )
-from sc2reader.events.message import ChatEvent, PingEvent, ProgressEvent
+from sc2reader.events.message import (
+    ChatEvent,
+    MessageEvent,
+    PingEvent,
+    ProgressEvent,
+)
 from sc2reader.events.tracker import (
+    TrackerTable,
     PlayerSetupEvent,
     PlayerStatsEvent,
     UnitBornEvent,
@@ -31,6 +40,39 @@ from sc2reader.events.tracker import (
 from sc2reader.utils import DepotFile
 from sc2reader.decoders import BitPackedDecoder, ByteDecoder
 
+#: The base classes of the events built by the event factory
+#: functions found in the readers' EVENT_DISPATCH tables.
+EVENT_FACTORY_CLASSES = {
+    create_command_event: CommandEvent,
+    create_control_group_event: ControlGroupEvent,
+}
+
+
+def filter_event_class(event_class, event_types):
+    """
+    Returns the constructor to use for ``event_class`` when only events that
+    are instances of ``event_types`` are wanted, or None if it can never
+    build one. Event factory functions that build wanted and unwanted
+    events are wrapped so that they return None for the unwanted ones.
+    """
+    if event_class is None:
+        return None
+
+    base_class = EVENT_FACTORY_CLASSES.get(event_class, event_class)
+    if issubclass(base_class, event_types):
+        return event_class
+
+    elif any(issubclass(event_type, base_class) for event_type in event_types):
+
+        def create_event(*args):
+            event = event_class(*args)
+            return event if isinstance(event, event_types) else None
+
+        return create_event
+
+    else:
+        return None
+
 
 class InitDataReader:
     def __call__(self, data, replay):
@@ -385,30 +427,53 @@ class DetailsReader:
 
 class MessageEventsReader:
     def __call__(self, data, replay):
-        data = BitPackedDecoder(data)
         pings = list()
         messages = list()
         packets = list()
 
+        for event in self.iter_events(data, replay):
+            if isinstance(event, ChatEvent):
+                messages.append(event)
+            elif isinstance(event, PingEvent):
+                pings.append(event)
+            else:
+                packets.append(event)
+
+        return dict(pings=pings, messages=messages, packets=packets)
+
+    def iter_events(self, data, replay):
+        """
+        Yields the chat, ping, and progress events in ``data`` as they are decoded.
+        """
+        data = BitPackedDecoder(data)
+        event_types = tuple(replay.opt.get("event_types") or (MessageEvent,))
+        max_frame = replay.max_frame if replay.max_frame is not None else float("inf")
+
         frame = 0
         while not data.done():
             frame += data.read_frames()
+            if frame > max_frame:
+                break
+
             pid = data.read_bits(5)
             flag = data.read_bits(4)
             if flag == 0:  # Client chat message
                 recipient = data.read_bits(3 if replay.base_build >= 21955 else 2)
                 text = data.read_aligned_string(data.read_bits(11))
-                messages.append(ChatEvent(frame, pid, recipient, text))
+                if issubclass(ChatEvent, event_types):
+                    yield ChatEvent(frame, pid, recipient, text)
 
             elif flag == 1:  # Client ping message
                 recipient = data.read_bits(3 if replay.base_build >= 21955 else 2)
                 x = data.read_uint32() - 2147483648
                 y = data.read_uint32() - 2147483648
-                pings.append(PingEvent(frame, pid, recipient, x, y))
+                if issubclass(PingEvent, event_types):
+                    yield PingEvent(frame, pid, recipient, x, y)
 
             elif flag == 2:  # Loading progress message
                 progress = data.read_uint32() - 2147483648
-                packets.append(ProgressEvent(frame, pid, progress))
+                if issubclass(ProgressEvent, event_types):
+                    yield ProgressEvent(frame, pid, progress)
 
             elif flag == 3:  # Server ping message
                 pass
@@ -419,8 +484,6 @@ class MessageEventsReader:
 
             data.byte_align()
 
-        return dict(pings=pings, messages=messages, packets=packets)
-
 
 class GameEventsReader_Base:
     def __init__(self):
@@ -509,12 +572,25 @@ class GameEventsReader_Base:
         }
 
     def __call__(self, data, replay):
-        data = BitPackedDecoder(data)
         game_events = list()
+        for event in self.iter_events(data, replay, game_events):
+            pass
+        return game_events
+
+    def iter_events(self, data, replay, history=None):
+        """
+        Yields the game events in ``data`` as they are decoded. Each event
+        is also appended to ``history``, which is attached to any
+        :class:`ReadError` raised; by default only the most recent events
+        are kept so that memory use doesn't grow with the replay.
+        """
+        data = BitPackedDecoder(data)
+        game_events = collections.deque(maxlen=10) if history is None else history
 
         # method short cuts, avoid dict lookups
-        EVENT_DISPATCH = self.EVENT_DISPATCH
+        EVENT_DISPATCH = self.get_event_dispatch(replay.opt.get("event_types"))
         debug = replay.opt["debug"]
+        max_frame = replay.max_frame if replay.max_frame is not None else float("inf")
         tell = data.tell
         read_frames = data.read_frames
         read_bits = data.read_bits
@@ -527,6 +603,9 @@ class GameEventsReader_Base:
             data_length = data.length
             while event_start != data_length:
                 fstamp += read_frames()
+                if fstamp > max_frame:
+                    break
+
                 pid = read_bits(5)
                 event_type = read_bits(7)
                 event_class, event_parser = EVENT_DISPATCH.get(event_type, (None, None))
@@ -534,11 +613,13 @@ class GameEventsReader_Base:
                     event_data = event_parser(data)
                     if event_class is not None:
                         event = event_class(fstamp, pid, event_data)
-                        append(event)
-                        if debug:
-                            event.bytes = data.read_range(event_start, tell())
+                        if event is not None:
+                            append(event)
+                            if debug:
+                                event.bytes = data.read_range(event_start, tell())
+                            yield event
                     else:
-                        pass  # Skipping unused events
+                        pass  # Skipping unused and unwanted events
 
                 # Otherwise throw a read error
                 else:
@@ -549,14 +630,13 @@ class GameEventsReader_Base:
                         event_type,
                         event_start,
                         replay,
-                        game_events,
+                        list(game_events),
                         data,
                     )
 
                 byte_align()
                 event_start = tell()
 
-            return game_events
         except ParseError as e:
             raise ReadError(
                 "Parse error '{}' unknown at position {}.".format(
@@ -565,21 +645,86 @@ class GameEventsReader_Base:
                 event_type,
                 event_start,
                 replay,
-                game_events,
+                list(game_events),
                 data,
             )
         except EOFError as e:
             raise ReadError(
                 "EOFError error '{}' unknown at position {}.".format(
-                    e.msg, hex(event_start)
+                    e, hex(event_start)
                 ),
                 event_type,
                 event_start,
                 replay,
-                game_events,
+                list(game_events),
                 data,
             )
 
+    def get_event_dispatch(self, event_types=None):
+        """
+        Returns the EVENT_DISPATCH table to use when only events that are
+        instances of ``event_types`` are wanted. Unwanted events are read
+        past with their skip parsers where the reader has them, and with
+        their normal parsers otherwise, and no event objects are built.
+        """
+        if not event_types:
+            return self.EVENT_DISPATCH
+
+        key = frozenset(event_types)
+        filtered = self.__dict__.setdefault("_filtered_dispatch", dict())
+        if key not in filtered:
+            event_types = tuple(key)
+            skip_dispatch = self.get_skip_dispatch()
+            filtered[key] = dict()
+            for event_type, (event_class, parser) in self.EVENT_DISPATCH.items():
+                event_class = filter_event_class(event_class, event_types)
+                if event_class is None:
+                    parser = skip_dispatch[event_type]
+                filtered[key][event_type] = (event_class, parser)
+        return filtered[key]
+
+    def get_skip_dispatch(self):
+        """
+        Returns the table of parsers that read past each event type in
+        EVENT_DISPATCH without decoding it. Event types without a skip
+        parser keep their normal parser.
+        """
+        if "_skip_dispatch" not in self.__dict__:
+            self._skip_dispatch = {
+                event_type: self.get_skip_parser(parser)
+                for event_type, (event_class, parser) in self.EVENT_DISPATCH.items()
+            }
+        return self._skip_dispatch
+
+    def get_skip_parser(self, parser):
+        """
+        Returns the ``skip_<name>`` method for the ``parser`` method, or the
+        parser itself if there isn't one. A skip parser is only used if it
+        is defined alongside or after the parser it stands in for, so that
+        readers which change an event's layout never use a stale one.
+        """
+        name = getattr(parser, "__name__", None)
+        if name is None or getattr(parser, "__self__", None) is not self:
+            return parser
+
+        for cls in type(self).__mro__:
+            if "skip_" + name in vars(cls):
+                return getattr(self, "skip_" + name)
+            elif name in vars(cls):
+                return parser
+        return parser
+
+    def skip_selection_mask(self, data, index_bits):
+        """
+        Reads past a remove mask choice, where mask lengths, index counts
+        and indices each take ``index_bits`` bits.
+        """
+        choice = data.read_bits(2)
+        if choice == 1:
+            data.read_bits(data.read_bits(index_bits))
+        elif choice != 0:
+            data.read_bits(data.read_bits(index_bits) * index_bits)
+
     # Don't want to do this more than once
     SINGLE_BIT_MASKS = [0x1 << i for i in range(2**9)]
 
@@ -659,6 +804,9 @@ class GameEventsReader_15405(GameEventsReader_Base):
             starting_rally=None,
         )
 
+    def skip_user_options_event(self, data):
+        data.read_bits(4)
+
     def save_game_event(self, data):
         return dict(
             file_name=data.read_aligned_string(data.read_bits(11)),
@@ -734,6 +882,12 @@ class GameEventsReader_15405(GameEventsReader_Base):
             add_unit_tags=[data.read_uint32() for i in range(data.read_uint8())],
         )
 
+    def skip_selection_delta_event(self, data):
+        data.read_bits(12)
+        data.read_bits(data.read_uint8())
+        data.read_bits(data.read_uint8() * 32)
+        data.read_bits(data.read_uint8() * 32)
+
     def control_group_update_event(self, data):
         return dict(
             control_group_index=data.read_bits(4),
@@ -743,6 +897,11 @@ class GameEventsReader_15405(GameEventsReader_Base):
             else ("None", None),
         )
 
+    def skip_control_group_update_event(self, data):
+        data.read_bits(6)
+        if data.read_bool():
+            data.read_bits(data.read_uint8())
+
     def selection_sync_check_event(self, data):
         return dict(
             control_group_index=data.read_bits(4),
@@ -756,6 +915,9 @@ class GameEventsReader_15405(GameEventsReader_Base):
             ),
         )
 
+    def skip_selection_sync_check_event(self, data):
+        data.read_bits(124)
+
     def resource_trade_event(self, data):
         return dict(
             recipient_id=data.read_bits(4),
@@ -835,6 +997,12 @@ class GameEventsReader_15405(GameEventsReader_Base):
             reason=None,
         )
 
+    def skip_camera_update_event(self, data):
+        data.read_bits(32)
+        for i in range(3):
+            if data.read_bool():
+                data.read_bits(16)
+
     def trigger_abort_mission_event(self, data):
         return None
 
@@ -889,6 +1057,9 @@ class GameEventsReader_15405(GameEventsReader_Base):
             ),
         )
 
+    def skip_trigger_mouse_clicked_event(self, data):
+        data.read_bits(193)
+
     def trigger_planet_panel_replay_event(self, data):
         return None
 
@@ -901,6 +1072,9 @@ class GameEventsReader_15405(GameEventsReader_Base):
     def trigger_key_pressed_event(self, data):
         return dict(key=data.read_uint8() - 128, flags=data.read_uint8() - 128)
 
+    def skip_trigger_key_pressed_event(self, data):
+        data.read_bits(16)
+
     def trigger_movie_function_event(self, data):
         return dict(function_name=data.read_aligned_string(data.read_bits(7)))
 
@@ -1045,6 +1219,25 @@ class GameEventsReader_16561(GameEventsReader_15405):
             other_unit_tag=data.read_uint32() if data.read_bool() else None,
         )
 
+    def skip_command_event(self, data):
+        data.read_bits(17)
+        if data.read_bool():
+            data.read_bits(21)
+            if data.read_bool():
+                data.read_bits(8)
+        target = data.read_bits(2)
+        if target == 1:
+            data.read_bits(72)
+        elif target == 2:
+            data.read_bits(64)
+            if data.read_bool():
+                data.read_bits(4)
+            data.read_bits(72)
+        elif target == 3:
+            data.read_bits(32)
+        if data.read_bool():
+            data.read_bits(32)
+
     def selection_delta_event(self, data):
         return dict(
             control_group_index=data.read_bits(4),
@@ -1076,6 +1269,12 @@ class GameEventsReader_16561(GameEventsReader_15405):
             add_unit_tags=[data.read_uint32() for i in range(data.read_uint8())],
         )
 
+    def skip_selection_delta_event(self, data):
+        data.read_bits(12)
+        self.skip_selection_mask(data, 8)
+        data.read_bits(data.read_uint8() * 32)
+        data.read_bits(data.read_uint8() * 32)
+
     def control_group_update_event(self, data):
         return dict(
             control_group_index=data.read_bits(4),
@@ -1097,6 +1296,10 @@ class GameEventsReader_16561(GameEventsReader_15405):
             }[data.read_bits(2)](),
         )
 
+    def skip_control_group_update_event(self, data):
+        data.read_bits(6)
+        self.skip_selection_mask(data, 8)
+
     def decrement_game_time_remaining_event(self, data):
         # really this should be set to 19, and a new GameEventsReader_41743 should be introduced that specifies 32 bits.
         # but I don't care about ability to read old replays.
@@ -1139,6 +1342,9 @@ class GameEventsReader_17326(GameEventsReader_16939):
             ),
         )
 
+    def skip_trigger_mouse_clicked_event(self, data):
+        data.read_bits(127)
+
     def trigger_mouse_moved_event(self, data):
         return dict(
             position_ui=dict(x=data.read_bits(11), y=data.read_bits(11)),
@@ -1149,6 +1355,9 @@ class GameEventsReader_17326(GameEventsReader_16939):
             ),
         )
 
+    def skip_trigger_mouse_moved_event(self, data):
+        data.read_bits(94)
+
 
 class GameEventsReader_18092(GameEventsReader_17326):
     pass
@@ -1303,6 +1512,9 @@ class GameEventsReader_22612(GameEventsReader_21029):
             starting_rally=None,
         )
 
+    def skip_user_options_event(self, data):
+        data.read_bits(6)
+
     def command_event(self, data):
         return dict(
             flags=data.read_bits(20),
@@ -1350,6 +1562,26 @@ class GameEventsReader_22612(GameEventsReader_21029):
             other_unit_tag=data.read_uint32() if data.read_bool() else None,
         )
 
+    def skip_command_event(self, data):
+        data.read_bits(20)
+        if data.read_bool():
+            data.read_bits(21)
+            if data.read_bool():
+                data.read_bits(8)
+        target = data.read_bits(2)
+        if target == 1:
+            data.read_bits(72)
+        elif target == 2:
+            data.read_bits(64)
+            for i in range(2):
+                if data.read_bool():
+                    data.read_bits(4)
+            data.read_bits(72)
+        elif target == 3:
+            data.read_bits(32)
+        if data.read_bool():
+            data.read_bits(32)
+
     def selection_delta_event(self, data):
         return dict(
             control_group_index=data.read_bits(4),
@@ -1381,6 +1613,12 @@ class GameEventsReader_22612(GameEventsReader_21029):
             add_unit_tags=[data.read_uint32() for i in range(data.read_bits(9))],
         )
 
+    def skip_selection_delta_event(self, data):
+        data.read_bits(13)
+        self.skip_selection_mask(data, 9)
+        data.read_bits(data.read_bits(9) * 33)
+        data.read_bits(data.read_bits(9) * 32)
+
     def control_group_update_event(self, data):
         return dict(
             control_group_index=data.read_bits(4),
@@ -1402,6 +1640,10 @@ class GameEventsReader_22612(GameEventsReader_21029):
             }[data.read_bits(2)](),
         )
 
+    def skip_control_group_update_event(self, data):
+        data.read_bits(6)
+        self.skip_selection_mask(data, 9)
+
     def selection_sync_check_event(self, data):
         return dict(
             control_group_index=data.read_bits(4),
@@ -1415,6 +1657,9 @@ class GameEventsReader_22612(GameEventsReader_21029):
             ),
         )
 
+    def skip_selection_sync_check_event(self, data):
+        data.read_bits(127)
+
     def ai_communicate_event(self, data):
         return dict(
             beacon=data.read_uint8() - 128,
@@ -1441,6 +1686,9 @@ class GameEventsReader_22612(GameEventsReader_21029):
             pinged_minimap=data.read_bool(),
         )
 
+    def skip_trigger_ping_event(self, data):
+        data.read_bits(97)
+
     def trigger_transmission_offset_event(self, data):
         # I'm not actually sure when this second int is introduced..
         return dict(
@@ -1495,6 +1743,9 @@ class GameEventsReader_23260(GameEventsReader_22612):
             base_build_num=None,
         )
 
+    def skip_user_options_event(self, data):
+        data.read_bits(7)
+
 
 class GameEventsReader_HotSBeta(GameEventsReader_23260):
     def user_options_event(self, data):
@@ -1510,6 +1761,9 @@ class GameEventsReader_HotSBeta(GameEventsReader_23260):
             use_ai_beacons=None,
         )
 
+    def skip_user_options_event(self, data):
+        data.read_bits(38)
+
     def selection_delta_event(self, data):
         return dict(
             control_group_index=data.read_bits(4),
@@ -1541,6 +1795,12 @@ class GameEventsReader_HotSBeta(GameEventsReader_23260):
             add_unit_tags=[data.read_uint32() for i in range(data.read_bits(9))],
         )
 
+    def skip_selection_delta_event(self, data):
+        data.read_bits(13)
+        self.skip_selection_mask(data, 9)
+        data.read_bits(data.read_bits(9) * 41)
+        data.read_bits(data.read_bits(9) * 32)
+
     def camera_update_event(self, data):
         return dict(
             target=dict(x=data.read_uint16(), y=data.read_uint16())
@@ -1551,6 +1811,13 @@ class GameEventsReader_HotSBeta(GameEventsReader_23260):
             yaw=data.read_uint16() if data.read_bool() else None,
         )
 
+    def skip_camera_update_event(self, data):
+        if data.read_bool():
+            data.read_bits(32)
+        for i in range(3):
+            if data.read_bool():
+                data.read_bits(16)
+
     def trigger_dialog_control_event(self, data):
         return dict(
             control_id=data.read_uint32() - 2147483648,
@@ -1641,6 +1908,13 @@ class GameEventsReader_24247(GameEventsReader_HotSBeta):
             reason=None,
         )
 
+    def skip_camera_update_event(self, data):
+        if data.read_bool():
+            data.read_bits(32)
+        for i in range(3):
+            if data.read_bool():
+                data.read_bits(16)
+
     def trigger_target_mode_update_event(self, data):
         return dict(
             ability_link=data.read_uint16(),
@@ -1679,6 +1953,9 @@ class GameEventsReader_26490(GameEventsReader_24247):
             use_ai_beacons=None,
         )
 
+    def skip_user_options_event(self, data):
+        data.read_bits(39)
+
     def trigger_mouse_clicked_event(self, data):
         return dict(
             button=data.read_uint32(),
@@ -1692,6 +1969,9 @@ class GameEventsReader_26490(GameEventsReader_24247):
             flags=data.read_uint8() - 128,
         )
 
+    def skip_trigger_mouse_clicked_event(self, data):
+        data.read_bits(135)
+
     def trigger_mouse_moved_event(self, data):
         return dict(
             position_ui=dict(x=data.read_bits(11), y=data.read_bits(11)),
@@ -1703,6 +1983,9 @@ class GameEventsReader_26490(GameEventsReader_24247):
             flags=data.read_uint8() - 128,
         )
 
+    def skip_trigger_mouse_moved_event(self, data):
+        data.read_bits(102)
+
 
 class GameEventsReader_27950(GameEventsReader_26490):
     def hijack_replay_game_event(self, data):
@@ -1738,6 +2021,15 @@ class GameEventsReader_27950(GameEventsReader_26490):
             reason=data.read_uint8() - 128 if data.read_bool() else None,
         )
 
+    def skip_camera_update_event(self, data):
+        if data.read_bool():
+            data.read_bits(32)
+        for i in range(3):
+            if data.read_bool():
+                data.read_bits(16)
+        if data.read_bool():
+            data.read_bits(8)
+
     def game_user_join_event(self, data):
         return dict(
             observe=data.read_bits(2),
@@ -1916,6 +2208,28 @@ class GameEventsReader_34784(GameEventsReader_27950):
             unit_group=data.read_uint32() if data.read_bool() else None,
         )
 
+    def skip_command_event(self, data, flag_bits=23):
+        data.read_bits(flag_bits)
+        if data.read_bool():
+            data.read_bits(21)
+            if data.read_bool():
+                data.read_bits(8)
+        target = data.read_bits(2)
+        if target == 1:
+            data.read_bits(72)
+        elif target == 2:
+            data.read_bits(72)
+            for i in range(2):
+                if data.read_bool():
+                    data.read_bits(4)
+            data.read_bits(72)
+        elif target == 3:
+            data.read_bits(32)
+        data.read_bits(32)
+        for i in range(2):
+            if data.read_bool():
+                data.read_bits(32)
+
     def user_options_event(self, data):
         return dict(
             game_fully_downloaded=data.read_bool(),
@@ -1936,6 +2250,10 @@ class GameEventsReader_34784(GameEventsReader_27950):
             use_ai_beacons=None,
         )
 
+    def skip_user_options_event(self, data):
+        data.read_bits(107)
+        data.read_aligned_bytes(data.read_bits(9))
+
     def trigger_ping_event(self, data):
         return dict(
             point=dict(
@@ -1946,6 +2264,9 @@ class GameEventsReader_34784(GameEventsReader_27950):
             option=data.read_uint32() - 2147483648,
         )
 
+    def skip_trigger_ping_event(self, data):
+        data.read_bits(129)
+
     def camera_update_event(self, data):
         return dict(
             target=dict(x=data.read_uint16(), y=data.read_uint16())
@@ -1958,9 +2279,22 @@ class GameEventsReader_34784(GameEventsReader_27950):
             follow=data.read_bool(),
         )
 
+    def skip_camera_update_event(self, data):
+        if data.read_bool():
+            data.read_bits(32)
+        for i in range(3):
+            if data.read_bool():
+                data.read_bits(16)
+        if data.read_bool():
+            data.read_bits(8)
+        data.read_bits(1)
+
     def trigger_hotkey_pressed_event(self, data):
         return dict(hotkey=data.read_uint32(), down=data.read_bool())
 
+    def skip_trigger_hotkey_pressed_event(self, data):
+        data.read_bits(33)
+
     def game_user_join_event(self, data):
         return dict(
             observe=data.read_bits(2),
@@ -2004,6 +2338,10 @@ class GameEventsReader_36442(GameEventsReader_34784):
             }[data.read_bits(2)](),
         )
 
+    def skip_control_group_update_event(self, data):
+        data.read_bits(7)
+        self.skip_selection_mask(data, 9)
+
 
 class GameEventsReader_38215(GameEventsReader_36442):
     def __init__(self):
@@ -2035,6 +2373,9 @@ class GameEventsReader_38215(GameEventsReader_36442):
             flags=data.read_uint8() - 128,  # 112 in protocol38125.py
         )
 
+    def skip_trigger_mousewheel_event(self, data):
+        data.read_bits(24)
+
     def command_event(self, data):
         # this function is exactly the same as command_event() from GameEventsReader_36442
         # with the only change being that flags now has 25 bits instead of 23.
@@ -2086,6 +2427,9 @@ class GameEventsReader_38215(GameEventsReader_36442):
             unit_group=data.read_uint32() if data.read_bool() else None,
         )
 
+    def skip_command_event(self, data, flag_bits=25):
+        super().skip_command_event(data, flag_bits)
+
     def user_options_event(self, data):
         # only change: removes starting_rally
         return dict(
@@ -2106,6 +2450,10 @@ class GameEventsReader_38215(GameEventsReader_36442):
             use_ai_beacons=None,
         )
 
+    def skip_user_options_event(self, data):
+        data.read_bits(106)
+        data.read_aligned_bytes(data.read_bits(9))
+
 
 class GameEventsReader_38749(GameEventsReader_38215):
     def trigger_ping_event(self, data):
@@ -2126,6 +2474,13 @@ class GameEventsReader_38749(GameEventsReader_38215):
             option=data.read_uint32() - 2147483648,
         )
 
+    def skip_trigger_ping_event(self, data):
+        data.read_bits(112)
+        for i in range(2):
+            if data.read_bool():
+                data.read_bits(4)
+        data.read_bits(105)
+
 
 class GameEventsReader_38996(GameEventsReader_38749):
     def trigger_ping_event(self, data):
@@ -2147,6 +2502,13 @@ class GameEventsReader_38996(GameEventsReader_38749):
             option=data.read_uint32() - 2147483648,
         )
 
+    def skip_trigger_ping_event(self, data):
+        data.read_bits(112)
+        for i in range(2):
+            if data.read_bool():
+                data.read_bits(4)
+        data.read_bits(106)
+
 
 class GameEventsReader_64469(GameEventsReader_38996):
     # this function is exactly the same as command_event() from GameEventsReader_38996
@@ -2200,6 +2562,9 @@ class GameEventsReader_64469(GameEventsReader_38996):
             unit_group=data.read_uint32() if data.read_bool() else None,
         )
 
+    def skip_command_event(self, data, flag_bits=26):
+        super().skip_command_event(data, flag_bits)
+
 
 class GameEventsReader_65895(GameEventsReader_64469):
     """
@@ -2278,6 +2643,9 @@ class GameEventsReader_80669(GameEventsReader_65895):
             unit_group=data.read_uint32() if data.read_bool() else None,
         )
 
+    def skip_command_event(self, data, flag_bits=27):
+        super().skip_command_event(data, flag_bits)
+
 
 class TrackerEventsReader:
     def __init__(self):
@@ -2295,17 +2663,49 @@ class TrackerEventsReader:
         }
 
     def __call__(self, data, replay):
+        if replay.opt.get("tracker_table", False):
+            table = TrackerTable(replay.build)
+            for frames, event_class, event_data in self.iter_event_data(data, replay):
+                table.append(event_class, frames, event_data)
+            return table
+
+        return list(self.iter_events(data, replay))
+
+    def iter_events(self, data, replay):
+        """
+        Yields the tracker events in ``data`` as they are decoded.
+        """
+        for frames, event_class, event_data in self.iter_event_data(data, replay):
+            yield event_class(frames, event_data, replay.build)
+
+    def iter_event_data(self, data, replay):
+        """
+        Yields the frame, event class and decoded data of the tracker
+        events in ``data`` without building the events.
+        """
         decoder = BitPackedDecoder(data)
+        EVENT_DISPATCH = self.EVENT_DISPATCH
+
+        event_types = replay.opt.get("event_types")
+        if event_types:
+            event_types = tuple(event_types)
+            EVENT_DISPATCH = {
+                etype: filter_event_class(event_class, event_types)
+                for etype, event_class in EVENT_DISPATCH.items()
+            }
+
+        max_frame = replay.max_frame if replay.max_frame is not None else float("inf")
 
         frames = 0
-        events = list()
         while not decoder.done():
-            decoder._buffer.read(3)  # 03 00 09
+            decoder.read_aligned_bytes(3)  # 03 00 09
             frames += decoder.read_vint()
-            decoder._buffer.read(1)  # 09
+            if frames > max_frame:
+                break
+
+            decoder.read_aligned_bytes(1)  # 09
             etype = decoder.read_vint()
             event_data = decoder.read_struct()
-            event = self.EVENT_DISPATCH[etype](frames, event_data, replay.build)
-            events.append(event)
-
-        return events
+            event_class = EVENT_DISPATCH[etype]
+            if event_class is not None:
+                yield frames, event_class, event_data
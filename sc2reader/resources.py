@@ -1,6 +1,13 @@
 from collections import defaultdict, namedtuple
+from contextlib import contextmanager
 from datetime import datetime
 import hashlib
+import heapq
+from io import BytesIO
+import mmap
+import time
+import tracemalloc
+import weakref
 from xml.etree import ElementTree
 import zlib
 
@@ -12,6 +19,8 @@ from sc2reader import log_utils
 from sc2reader import readers
 from sc2reader import exceptions
 from sc2reader.data import datapacks
+from sc2reader.events.game import GameEvent
+from sc2reader.events.tracker import TrackerTable
 from sc2reader.exceptions import SC2ReaderLocalizationError, CorruptTrackerFileError
 from sc2reader.objects import (
     Participant,
@@ -22,8 +31,78 @@ from sc2reader.objects import (
     Graph,
     BuildEntry,
     MapInfo,
+    ReplayProbe,
 )
-from sc2reader.constants import GAME_SPEED_FACTOR, LOBBY_PROPERTIES
+from sc2reader.constants import GAME_SPEED_FACTOR, LOBBY_PROPERTIES, LOCALIZED_RACES
+
+
+class LazyRawData(dict):
+    """
+    The raw data of a replay loaded with the ``lazy`` option. The event
+    files are only extracted from the replay archive and decoded when they
+    are first looked up.
+    """
+
+    lazy_files = (
+        "replay.message.events",
+        "replay.tracker.events",
+        "replay.game.events",
+    )
+
+    def __init__(self, replay, data=()):
+        super().__init__(data)
+        self.replay = replay
+
+    def __missing__(self, data_file):
+        if data_file in self.lazy_files and hasattr(self.replay, "archive"):
+            data = self.replay._extract_data_file(data_file)
+            if data:
+                reader = self.replay._get_reader(data_file)
+                with self.replay._timed(data_file):
+                    self[data_file] = reader(data, self.replay)
+                return dict.__getitem__(self, data_file)
+        raise KeyError(data_file)
+
+    def __contains__(self, data_file):
+        try:
+            self[data_file]
+            return True
+        except KeyError:
+            return False
+
+    def get(self, data_file, default=None):
+        return self[data_file] if data_file in self else default
+
+    def __reduce__(self):
+        # Only the files decoded so far are kept, as a plain dict
+        return (dict, (dict(self),))
+
+
+class LazyEvents:
+    """
+    A list of events on a :class:`Replay` that is filled in by the given
+    load method. Replays loaded with the ``lazy`` option call the load
+    method when the list is first used; for other replays the list is
+    empty until the events are loaded.
+    """
+
+    def __init__(self, load_method):
+        self.load_method = load_method
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, replay, owner=None):
+        if replay is None:
+            return self
+        if self.name not in replay.__dict__:
+            if replay.opt.get("lazy", False):
+                getattr(replay, self.load_method)()
+            replay.__dict__.setdefault(self.name, list())
+        return replay.__dict__[self.name]
+
+    def __set__(self, replay, value):
+        replay.__dict__[self.name] = value
 
 
 class Resource:
@@ -33,10 +112,48 @@ class Resource:
         self.logger = log_utils.get_logger(self.__class__)
         self.filename = filename or getattr(file_object, "name", "Unavailable")
 
+        # The maps and files the factory opens are only hashed once the
+        # filehash is used, unless the caller already knows it. In memory
+        # files are kept as a snapshot of their bytes, which shares their
+        # buffer, and other files are hashed now as the caller may close them.
+        self._filehash = options.get("filehash", None)
+        self._hashed_file = None
         if hasattr(file_object, "seek"):
+            if isinstance(file_object, (mmap.mmap, utils.PositionalFile)):
+                self._hashed_file = file_object
+            elif isinstance(file_object, BytesIO):
+                self._hashed_file = file_object.getvalue()
+            elif self._filehash is None:
+                self._filehash = self._get_file_hash(file_object)
             file_object.seek(0)
-            self.filehash = hashlib.sha256(file_object.read()).hexdigest()
-            file_object.seek(0)
+
+    @property
+    def filehash(self):
+        """
+        The hex digest of the resource file, computed with the
+        ``hash_algorithm`` option (sha256 by default) when first used. Can
+        be given with the ``filehash`` option to skip hashing the file. None
+        if the resource wasn't loaded from a seekable file.
+        """
+        if self._filehash is None and self._hashed_file is not None:
+            self._filehash = self._get_file_hash(self._hashed_file)
+        return self._filehash
+
+    @filehash.setter
+    def filehash(self, value):
+        self._filehash = value
+
+    def _get_file_hash(self, file_object):
+        if isinstance(file_object, bytes):
+            algorithm = self.opt.get("hash_algorithm", "sha256")
+            return hashlib.new(algorithm, file_object).hexdigest()
+
+        position = file_object.tell()
+        filehash = utils.get_file_hash(
+            file_object, self.opt.get("hash_algorithm", "sha256")
+        )
+        file_object.seek(position)
+        return filehash
 
 
 class Replay(Resource):
@@ -51,6 +168,15 @@ class Replay(Resource):
     #: Total number of frames in this game at 16 frames per second.
     frames = int()
 
+    #: The last frame decoded when loading was bounded with the ``max_frame``
+    #: or ``until_second`` options. Events after this frame are not read.
+    max_frame = None
+
+    #: The number of frames the events were set back by when a plugin moved
+    #: the start of the game, as the GameHeartNormalizer does. Events loaded
+    #: into the replay later on are set back by the same number of frames.
+    frame_offset = 0
+
     #: The SCII client build number
     build = int()
 
@@ -163,17 +289,33 @@ class Replay(Resource):
     computers = list()
 
     #: A list of all the chat message events from the game
-    messages = list()
+    messages = LazyEvents("load_message_events")
 
     #: A list of pings sent by all the different people in the game
-    pings = list()
+    pings = LazyEvents("load_message_events")
 
     #: A list of packets sent between the various game clients
-    packets = list()
+    packets = LazyEvents("load_message_events")
+
+    #: A list of all the message events from the game; chat messages,
+    #: pings, and packets
+    message_events = LazyEvents("load_message_events")
+
+    #: A list of all the tracker events from the game
+    tracker_events = LazyEvents("load_tracker_events")
+
+    #: A list of all the game events from the game
+    game_events = LazyEvents("load_game_events")
 
     #: A reference to the :class:`Person` that recorded the game
     recorder = None
 
+    #: A dict of load phase => {"time": seconds, "memory": bytes} holding the
+    #: wall time of each phase of the load when loaded with the ``timings``
+    #: option, None otherwise. The peak memory of each phase is only recorded
+    #: while ``tracemalloc`` is tracing.
+    timings = None
+
     #: If there is a valid winning team this will contain a :class:`Team` otherwise it will be :class:`None`
     winner = None
 
@@ -204,11 +346,23 @@ class Replay(Resource):
         load_level=4,
         engine=sc2reader.engine,
         do_tracker_events=True,
+        raw_data=None,
         **options,
     ):
         super().__init__(replay_file, filename, **options)
         self.datapack = None
-        self.raw_data = dict()
+        self.timings = dict() if options.get("timings", False) else None
+
+        # Previously decoded archive members aren't extracted or read again.
+        # Lazy replays only decode the event files once they are used.
+        if options.get("lazy", False):
+            self.raw_data = LazyRawData(self, raw_data or dict())
+        else:
+            self.raw_data = dict(raw_data or dict())
+        self._loaded_events = set()
+
+        # Archive members decompressed ahead of time by extract_threads
+        self._extracted = dict()
 
         # The current load level of the replay
         self.load_level = None
@@ -240,35 +394,31 @@ class Replay(Resource):
         self.entities = list()
 
         self.attributes = defaultdict(dict)
-        self.messages = list()
         self.recorder = None  # Player object
-        self.packets = list()
         self.objects = {}
         self.active_units = {}
         self.game_fps = 16.0
 
-        self.tracker_events = list()
-        self.game_events = list()
+        self.tracker_table = None
 
-        # Bootstrap the readers.
+        # Readers and datapacks registered on this replay take preference
+        # over the defaults, which are shared by all replays of this class.
         self.registered_readers = defaultdict(list)
-        self.register_default_readers()
-
-        # Bootstrap the datapacks.
         self.registered_datapacks = list()
-        self.register_default_datapacks()
 
         # Unpack the MPQ and read header data if requested
         # Since the underlying traceback isn't important to most people, don't expose it in python2 anymore
         if load_level >= 0:
             self.load_level = 0
             try:
-                self.archive = mpyq.MPQArchive(replay_file, listfile=False)
+                with self._timed("mpq_open"):
+                    self.archive = mpyq.MPQArchive(replay_file, listfile=False)
             except Exception as e:
                 raise exceptions.MPQError("Unable to construct the MPQArchive", e)
 
-            header_content = self.archive.header["user_data_header"]["content"]
-            header_data = BitPackedDecoder(header_content).read_struct()
+            with self._timed("header"):
+                header_content = self.archive.header["user_data_header"]["content"]
+                header_data = BitPackedDecoder(header_content).read_struct()
             self.versions = list(header_data[1].values())
             self.frames = header_data[3]
             self.build = self.versions[4]
@@ -282,10 +432,99 @@ class Replay(Resource):
                 seconds=int(self.frames / fps)
             )
 
+            # Bound the events decoded below if requested. Seconds are
+            # counted the same way as the game length above.
+            self.max_frame = options.get("max_frame", None)
+            if options.get("until_second", None) is not None:
+                until_frame = int(options["until_second"] * fps)
+                if self.max_frame is None or until_frame < self.max_frame:
+                    self.max_frame = until_frame
+
+        # Load the rest of the replay as requested, lazy replays leave the
+        # events until they are used.
+        lazy = options.get("lazy", False)
+        self._load(
+            load_level, do_tracker_events=do_tracker_events, load_events=not lazy
+        )
+
+        # Run this replay through the engine as indicated. The engine needs
+        # all of the events so lazy replays only run it from Replay.load.
+        if not lazy:
+            self._run_engine(engine)
+
+        # Files read in place are closed once loaded, lazy replays still
+        # read from them until they are dropped.
+        if lazy and isinstance(self._get_archive_file(), utils.PositionalFile):
+            weakref.finalize(self, self.archive.file.close)
+        else:
+            self._close_archive_file()
+
+    def load(self, level=4, do_tracker_events=True, engine=sc2reader.engine):
+        """
+        Loads the replay up to the given load level in place. Only the parts
+        not loaded yet are read; the open archive, the data already decoded,
+        and the existing player objects are reused. Filtering replays with
+        ``load_level=1`` and loading the ones that pass is therefore no more
+        expensive than loading them fully in the first place.
+
+        The engine is run over all of the events loaded so far, pass
+        ``engine=None`` to skip it.
+
+        :param level: The load level to load up to, see
+            :meth:`~sc2reader.factories.SC2Factory.load_replay`.
+
+        :param do_tracker_events: Loads the tracker events from level 3 up.
+
+        :param engine: The engine to run over the replay once loaded.
+        """
+        if self.load_level is None:
+            raise ValueError(
+                "Replays loaded with load_level=-1 can't be loaded further"
+            )
+
+        self._load(level, do_tracker_events=do_tracker_events)
+        self._run_engine(engine)
+        if not self.opt.get("lazy", False):
+            self._close_archive_file()
+
+    def _get_archive_file(self):
+        return self.archive.file if hasattr(self, "archive") else None
+
+    def _open_archive_file(self):
+        # Files read in place are closed between loads
+        archive_file = self._get_archive_file()
+        if isinstance(archive_file, utils.PositionalFile):
+            archive_file.reopen()
+
+    def _close_archive_file(self):
+        # Only the files read in place hold a handle open
+        archive_file = self._get_archive_file()
+        if isinstance(archive_file, utils.PositionalFile):
+            archive_file.close()
+
+    def _load(self, level, do_tracker_events=True, load_events=True):
+        self._open_archive_file()
+
+        # Decompress all of the archive members needed up front if requested
+        if self.opt.get("extract_threads", None):
+            data_files = [
+                data_file
+                for data_file in self._get_data_files(
+                    level, do_tracker_events, load_events
+                )
+                if data_file not in self.raw_data.keys()
+            ]
+            if len(data_files) > 1:
+                with self._timed("extract"):
+                    self._extracted.update(
+                        utils.extract_data_files(
+                            data_files, self.archive, self.opt["extract_threads"]
+                        )
+                    )
+
         # Load basic details if requested
         # .backup files are read in case the main files are missing or removed
-        if load_level >= 1:
-            self.load_level = 1
+        if level >= 1 and self.load_level < 1:
             files = [
                 "replay.initData.backup",
                 "replay.details.backup",
@@ -299,32 +538,60 @@ class Replay(Resource):
             self.datapack = self._get_datapack()
 
             # Can only be effective if map data has been loaded
-            if options.get("load_map", False):
+            if self.opt.get("load_map", False):
                 self.load_map()
+            self.load_level = 1
 
-        # Load players if requested
-        if load_level >= 2:
-            self.load_level = 2
-            for data_file in ["replay.message.events"]:
-                self._read_data(data_file, self._get_reader(data_file))
-            self.load_message_events()
-            self.load_players()
+        # Load players and messages if requested
+        if level >= 2:
+            if load_events:
+                for data_file in ["replay.message.events"]:
+                    self._read_data(data_file, self._get_reader(data_file))
+                self.load_message_events()
+            if self.load_level < 2:
+                with self._timed("load_players"):
+                    self.load_players()
+                self.load_level = 2
 
         # Load tracker events if requested
-        if load_level >= 3 and do_tracker_events:
-            self.load_level = 3
-            for data_file in ["replay.tracker.events"]:
-                self._read_data(data_file, self._get_reader(data_file))
-            self.load_tracker_events()
+        if level >= 3 and do_tracker_events:
+            if load_events:
+                for data_file in ["replay.tracker.events"]:
+                    self._read_data(data_file, self._get_reader(data_file))
+                self.load_tracker_events()
+            self.load_level = max(self.load_level, 3)
 
         # Load events if requested
-        if load_level >= 4:
+        if level >= 4:
+            if load_events:
+                for data_file in ["replay.game.events"]:
+                    self._read_data(data_file, self._get_reader(data_file))
+                self.load_game_events()
             self.load_level = 4
-            for data_file in ["replay.game.events"]:
-                self._read_data(data_file, self._get_reader(data_file))
-            self.load_game_events()
 
-        # Run this replay through the engine as indicated
+    def _get_data_files(self, level, do_tracker_events=True, load_events=True):
+        # The archive members read by _load, in the order they are read
+        data_files = list()
+        if level >= 1 and self.load_level < 1:
+            data_files.extend(
+                [
+                    "replay.initData.backup",
+                    "replay.details.backup",
+                    "replay.attributes.events",
+                    "replay.initData",
+                    "replay.details",
+                ]
+            )
+        if load_events:
+            if level >= 2:
+                data_files.append("replay.message.events")
+            if level >= 3 and do_tracker_events:
+                data_files.append("replay.tracker.events")
+            if level >= 4:
+                data_files.append("replay.game.events")
+        return data_files
+
+    def _run_engine(self, engine):
         if engine:
             resume_events = [
                 ev for ev in self.game_events if ev.name == "HijackReplayGameEvent"
@@ -339,7 +606,8 @@ class Replay(Resource):
                     + "do_tracker_events=False option to generate context without tracker events."
                 )
 
-            engine.run(self)
+            with self._timed("engine"):
+                engine.run(self)
 
     def load_init_data(self):
         if "replay.initData" in self.raw_data:
@@ -589,24 +857,45 @@ class Replay(Resource):
             self.is_ladder = False
 
     def load_message_events(self):
-        if "replay.message.events" not in self.raw_data:
+        # Each kind of event is only added to the events once
+        if (
+            "replay.message.events" in self._loaded_events
+            or "replay.message.events" not in self.raw_data
+        ):
             return
+        self._loaded_events.add("replay.message.events")
 
         self.messages = self.raw_data["replay.message.events"]["messages"]
         self.pings = self.raw_data["replay.message.events"]["pings"]
         self.packets = self.raw_data["replay.message.events"]["packets"]
 
+        # Message events go before game events on the same frame regardless
+        # of which were loaded first.
         self.message_events = self.messages + self.pings + self.packets
-        self.events = sorted(self.events + self.message_events, key=lambda e: e.frame)
+        self._offset_events(self.message_events, self.frame_offset)
+        frame = self._get_frame_key()
+        with self._timed("sort_message_events"):
+            self.events = sorted(
+                self.events + self.message_events,
+                key=lambda e: (frame(e), isinstance(e, GameEvent)),
+            )
 
     def load_game_events(self):
         # Copy the events over
         # TODO: the events need to be fixed both on the reader and processor side
-        if "replay.game.events" not in self.raw_data:
+        if (
+            "replay.game.events" in self._loaded_events
+            or "replay.game.events" not in self.raw_data
+        ):
             return
+        self._loaded_events.add("replay.game.events")
 
         self.game_events = self.raw_data["replay.game.events"]
-        self.events = sorted(self.events + self.game_events, key=lambda e: e.frame)
+        self._offset_events(self.game_events, self.frame_offset)
+        with self._timed("sort_game_events"):
+            self.events = sorted(
+                self.events + self.game_events, key=self._get_frame_key()
+            )
 
         # hideous hack for HotS 2.0.0.23925, see https://github.com/GraylinKim/sc2reader/issues/87
         if (
@@ -618,11 +907,86 @@ class Replay(Resource):
             self.length = utils.Length(seconds=int(self.frames / self.game_fps))
 
     def load_tracker_events(self):
-        if "replay.tracker.events" not in self.raw_data:
+        if (
+            "replay.tracker.events" in self._loaded_events
+            or "replay.tracker.events" not in self.raw_data
+        ):
             return
+        self._loaded_events.add("replay.tracker.events")
 
         self.tracker_events = self.raw_data["replay.tracker.events"]
-        self.events = sorted(self.tracker_events + self.events, key=lambda e: e.frame)
+        if isinstance(self.tracker_events, TrackerTable):
+            self.tracker_table = self.tracker_events
+            self.tracker_events = self.tracker_table.events
+        self._offset_events(self.tracker_events, self.frame_offset)
+
+        with self._timed("sort_tracker_events"):
+            self.events = sorted(
+                self.tracker_events + self.events, key=self._get_frame_key()
+            )
+
+    def offset_events(self, frames):
+        """
+        Sets the events back by the given number of frames, for plugins that
+        move the start of the game. Events from before the new start go at
+        frame 0. Events loaded into the replay later on are set back as well
+        and ordered among the others as if they had been loaded first.
+        """
+        self.frame_offset += frames
+        self._offset_events(self.events, frames)
+
+    def _offset_events(self, events, frames):
+        # Events moved to frame 0 keep their old frame to be sorted by
+        if frames:
+            for event in events:
+                if event.frame < frames:
+                    if not hasattr(event, "_unshifted_frame"):
+                        event._unshifted_frame = (
+                            event.frame + self.frame_offset - frames
+                        )
+                    event.frame = 0
+                else:
+                    event.frame -= frames
+                event.second = event.frame >> 4
+
+    def _get_frame_key(self):
+        # The frame the events had before the start of the game was moved
+        if not self.frame_offset:
+            return lambda e: e.frame
+        offset = self.frame_offset
+        return lambda e: getattr(e, "_unshifted_frame", e.frame + offset)
+
+    def iter_events(self, kinds=("game", "tracker", "message")):
+        """
+        Yields the events of the requested kinds in frame order as they are
+        decoded, without building the event lists on the replay. Ties are
+        broken in the same tracker, message, game order as :attr:`events`.
+
+        Events are yielded as they come out of the readers; the engine is
+        not run over them so they carry player ids but not player or unit
+        references.
+
+        :param kinds: Any of ``"game"``, ``"tracker"``, and ``"message"``.
+        """
+        for kind in kinds:
+            if kind not in ("game", "tracker", "message"):
+                raise ValueError(f"Unknown event kind: {kind}")
+
+        streams = list()
+        for kind in ("tracker", "message", "game"):
+            if kind not in kinds:
+                continue
+
+            data_file = f"replay.{kind}.events"
+            data = self._extract_data_file(data_file)
+            if data:
+                reader = self._get_reader(data_file)
+                streams.append(reader.iter_events(data, self))
+
+        # The files are extracted up front, only the decoding is incremental
+        if not self.opt.get("lazy", False):
+            self._close_archive_file()
+        return heapq.merge(*streams, key=lambda e: e.frame)
 
     def register_reader(self, data_file, reader, filterfunc=lambda r: True):
         """
@@ -655,7 +1019,9 @@ class Replay(Resource):
         This is how you would add mappings for your favorite custom map.
 
         :param datapack: A :class:`BaseData` object to use for mapping unit
-            types and ability codes to their corresponding classes.
+            types and ability codes to their corresponding classes. Can also
+            be a function returning one, it is only called once the datapack
+            is selected for a replay.
 
         :param filterfunc: A function that accepts a partially loaded
             :class:`Replay` object as an argument and returns true if the
@@ -665,7 +1031,13 @@ class Replay(Resource):
 
     # Override points
     def register_default_readers(self):
-        """Registers factory default readers."""
+        """
+        Registers factory default readers.
+
+        The defaults are registered once per :class:`Replay` class and the
+        reader they select is remembered for each build, so their filters
+        should only depend on the build and version of the replay.
+        """
         self.register_reader("replay.details", readers.DetailsReader(), lambda r: True)
         self.register_reader(
             "replay.initData", readers.InitDataReader(), lambda r: True
@@ -783,136 +1155,300 @@ class Replay(Resource):
         )
 
     def register_default_datapacks(self):
-        """Registers factory default datapacks."""
+        """
+        Registers factory default datapacks.
+
+        The defaults are registered once per :class:`Replay` class and the
+        datapack they select is remembered for each build, so their filters
+        should only depend on the build, version, and expansion of the replay.
+        """
         self.register_datapack(
-            datapacks["WoL"]["16117"],
+            lambda: datapacks["WoL"]["16117"],
             lambda r: r.expansion == "WoL" and 16117 <= r.build < 17326,
         )
         self.register_datapack(
-            datapacks["WoL"]["17326"],
+            lambda: datapacks["WoL"]["17326"],
             lambda r: r.expansion == "WoL" and 17326 <= r.build < 18092,
         )
         self.register_datapack(
-            datapacks["WoL"]["18092"],
+            lambda: datapacks["WoL"]["18092"],
             lambda r: r.expansion == "WoL" and 18092 <= r.build < 19458,
         )
         self.register_datapack(
-            datapacks["WoL"]["19458"],
+            lambda: datapacks["WoL"]["19458"],
             lambda r: r.expansion == "WoL" and 19458 <= r.build < 22612,
         )
         self.register_datapack(
-            datapacks["WoL"]["22612"],
+            lambda: datapacks["WoL"]["22612"],
             lambda r: r.expansion == "WoL" and 22612 <= r.build < 24944,
         )
         self.register_datapack(
-            datapacks["WoL"]["24944"],
+            lambda: datapacks["WoL"]["24944"],
             lambda r: r.expansion == "WoL" and 24944 <= r.build,
         )
         self.register_datapack(
-            datapacks["HotS"]["base"],
+            lambda: datapacks["HotS"]["base"],
             lambda r: r.expansion == "HotS" and r.build < 23925,
         )
         self.register_datapack(
-            datapacks["HotS"]["23925"],
+            lambda: datapacks["HotS"]["23925"],
             lambda r: r.expansion == "HotS" and 23925 <= r.build < 24247,
         )
         self.register_datapack(
-            datapacks["HotS"]["24247"],
+            lambda: datapacks["HotS"]["24247"],
             lambda r: r.expansion == "HotS" and 24247 <= r.build < 24764,
         )
         self.register_datapack(
-            datapacks["HotS"]["24764"],
+            lambda: datapacks["HotS"]["24764"],
             lambda r: r.expansion == "HotS" and 24764 <= r.build < 38215,
         )
         self.register_datapack(
-            datapacks["HotS"]["38215"],
+            lambda: datapacks["HotS"]["38215"],
             lambda r: r.expansion == "HotS" and 38215 <= r.build,
         )
         self.register_datapack(
-            datapacks["LotV"]["base"],
+            lambda: datapacks["LotV"]["base"],
             lambda r: r.expansion == "LotV" and 34784 <= r.build,
         )
         self.register_datapack(
-            datapacks["LotV"]["44401"],
+            lambda: datapacks["LotV"]["44401"],
             lambda r: r.expansion == "LotV" and 44401 <= r.build < 47185,
         )
         self.register_datapack(
-            datapacks["LotV"]["47185"],
+            lambda: datapacks["LotV"]["47185"],
             lambda r: r.expansion == "LotV" and 47185 <= r.build < 48258,
         )
         self.register_datapack(
-            datapacks["LotV"]["48258"],
+            lambda: datapacks["LotV"]["48258"],
             lambda r: r.expansion == "LotV" and 48258 <= r.build < 53644,
         )
         self.register_datapack(
-            datapacks["LotV"]["53644"],
+            lambda: datapacks["LotV"]["53644"],
             lambda r: r.expansion == "LotV" and 53644 <= r.build < 54724,
         )
         self.register_datapack(
-            datapacks["LotV"]["54724"],
+            lambda: datapacks["LotV"]["54724"],
             lambda r: r.expansion == "LotV" and 54724 <= r.build < 59587,
         )
         self.register_datapack(
-            datapacks["LotV"]["59587"],
+            lambda: datapacks["LotV"]["59587"],
             lambda r: r.expansion == "LotV" and 59587 <= r.build < 70154,
         )
         self.register_datapack(
-            datapacks["LotV"]["70154"],
+            lambda: datapacks["LotV"]["70154"],
             lambda r: r.expansion == "LotV" and 70154 <= r.build < 76114,
         )
         self.register_datapack(
-            datapacks["LotV"]["76114"],
+            lambda: datapacks["LotV"]["76114"],
             lambda r: r.expansion == "LotV" and 76114 <= r.build < 77379,
         )
         self.register_datapack(
-            datapacks["LotV"]["77379"],
+            lambda: datapacks["LotV"]["77379"],
             lambda r: r.expansion == "LotV" and 77379 <= r.build < 80949,
         )
         self.register_datapack(
-            datapacks["LotV"]["80949"],
+            lambda: datapacks["LotV"]["80949"],
             lambda r: r.expansion == "LotV" and 80949 <= r.build < 89634,
         )
         self.register_datapack(
-            datapacks["LotV"]["89720"],
+            lambda: datapacks["LotV"]["89720"],
             lambda r: r.expansion == "LotV" and 89634 <= r.build,
         )
 
     # Internal Methods
+    @classmethod
+    def _get_defaults(cls):
+        # Registering the defaults creates a reader for every supported build
+        # so it is only done once per class instead of for every replay.
+        defaults = cls.__dict__.get("_defaults")
+        if defaults is None:
+            registry = cls.__new__(cls)
+            registry.registered_readers = defaultdict(list)
+            registry.registered_datapacks = list()
+            registry.register_default_readers()
+            registry.register_default_datapacks()
+            defaults = cls._defaults = dict(
+                readers=registry.registered_readers,
+                datapacks=registry.registered_datapacks,
+                reader_cache=dict(),
+                datapack_cache=dict(),
+            )
+        return defaults
+
     def _get_reader(self, data_file):
         for callback, reader in self.registered_readers[data_file]:
             if callback(self):
                 return reader
-        else:
-            raise ValueError(
-                "Valid {} reader could not found for build {}".format(
-                    data_file, self.build
+
+        defaults = self._get_defaults()
+        key = (data_file, tuple(self.versions))
+        if key not in defaults["reader_cache"]:
+            for callback, reader in defaults["readers"][data_file]:
+                if callback(self):
+                    defaults["reader_cache"][key] = reader
+                    break
+            else:
+                raise ValueError(
+                    "Valid {} reader could not found for build {}".format(
+                        data_file, self.build
+                    )
                 )
-            )
+        return defaults["reader_cache"][key]
 
     def _get_datapack(self):
         for callback, datapack in self.registered_datapacks:
             if callback(self):
-                return datapack
-        else:
-            return None
+                return datapack() if callable(datapack) else datapack
+
+        defaults = self._get_defaults()
+        key = (self.expansion, tuple(self.versions))
+        if key not in defaults["datapack_cache"]:
+            for callback, datapack in defaults["datapacks"]:
+                if callback(self):
+                    # Default datapacks are only loaded once they are selected
+                    datapack = datapack() if callable(datapack) else datapack
+                    break
+            else:
+                datapack = None
+            defaults["datapack_cache"][key] = datapack
+        return defaults["datapack_cache"][key]
 
     def _read_data(self, data_file, reader):
-        data = utils.extract_data_file(data_file, self.archive)
-        if data:
-            self.raw_data[data_file] = reader(data, self)
-        elif self.opt["debug"] and data_file not in [
-            "replay.message.events",
-            "replay.tracker.events",
-        ]:
-            raise ValueError(f"{data_file} not found in archive")
+        if data_file in self.raw_data:
+            return
+
+        with self._timed(data_file):
+            data = self._extract_data_file(data_file)
+            if data:
+                self.raw_data[data_file] = reader(data, self)
+            elif self.opt["debug"] and data_file not in [
+                "replay.message.events",
+                "replay.tracker.events",
+            ]:
+                raise ValueError(f"{data_file} not found in archive")
+
+    @contextmanager
+    def _timed(self, phase):
+        """
+        Adds the wall time of a phase of the load to :attr:`timings` when
+        loading with the ``timings`` option. If ``tracemalloc`` is tracing,
+        the most memory allocated at once during the phase is recorded too.
+        Repeated phases add up their times and keep the highest peak.
+        """
+        if self.timings is None:
+            yield
+            return
+
+        # Peaks from before the phase can only be reset from python 3.9 on
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            memory = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timing = self.timings.setdefault(phase, dict(time=0.0, memory=None))
+            timing["time"] += time.perf_counter() - start
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1] - memory
+                timing["memory"] = max(timing["memory"] or 0, peak)
+
+    def _extract_data_file(self, data_file):
+        if data_file in self._extracted:
+            return self._extracted.pop(data_file)
+        self._open_archive_file()
+        return utils.extract_data_file(data_file, self.archive)
 
     def __getstate__(self):
+        # Only the decoded files are pickled, so lazy replays decode the rest
+        # of their event files for the copy to load its events from.
+        if isinstance(self.raw_data, LazyRawData):
+            for data_file in LazyRawData.lazy_files:
+                self.raw_data.get(data_file)
+
         state = self.__dict__.copy()
         del state["registered_readers"]
         del state["registered_datapacks"]
+
+        # Memory maps and open files can't be pickled, the archive is left
+        # behind instead
+        in_place = (mmap.mmap, utils.PositionalFile)
+        if "archive" in state and isinstance(self.archive.file, in_place):
+            del state["archive"]
+        if self._hashed_file is not None:
+            state["_filehash"] = self.filehash
+            state["_hashed_file"] = None
         return state
 
 
+def probe_replay(replay_file, filename=None):
+    """
+    :param replay_file: A path to or file object of a sc2replay file.
+
+    :param filename: The filename to report, taken from ``replay_file``
+        if not given.
+
+    Reads the build, length, map, and players of a replay from its header
+    and replay.details file alone. The file isn't hashed and no players or
+    teams are created, which makes this much cheaper than loading the
+    replay with ``load_level=1``. Returns a
+    :class:`~sc2reader.objects.ReplayProbe`.
+    """
+    if filename is None and isinstance(replay_file, str):
+        filename = replay_file
+    elif filename is None:
+        filename = getattr(replay_file, "name", "Unavailable")
+
+    try:
+        archive = mpyq.MPQArchive(replay_file, listfile=False)
+    except Exception as e:
+        raise exceptions.MPQError("Unable to construct the MPQArchive", e)
+
+    try:
+        header_content = archive.header["user_data_header"]["content"]
+        header_data = BitPackedDecoder(header_content).read_struct()
+        details_data = utils.extract_data_file(
+            "replay.details", archive
+        ) or utils.extract_data_file("replay.details.backup", archive)
+    finally:
+        # Only close files opened by the archive itself
+        if archive.file is not replay_file:
+            archive.file.close()
+
+    if not details_data:
+        raise ValueError("replay.details not found in archive")
+
+    versions = list(header_data[1].values())
+    frames = header_data[3]
+    fps = 16.0
+    if 34784 <= versions[4]:  # lotv replay, adjust time
+        fps *= 1.4
+
+    # Same layout as read by readers.DetailsReader, see there for the rest
+    details = BitPackedDecoder(details_data).read_struct()
+    players = details[0]
+    return ReplayProbe(
+        filename=filename,
+        release_string="{}.{}.{}.{}".format(*versions[1:5]),
+        build=versions[4],
+        base_build=versions[5],
+        frames=frames,
+        length=utils.Length(seconds=int(frames / fps)),
+        map_name=details[1].decode("utf8"),
+        # Details names are prefixed with the clan tag, "&lt;TAG&gt;<sp/>Name"
+        players=tuple(p[0].decode("utf8").split("<sp/>")[-1] for p in players),
+        races=tuple(
+            LOCALIZED_RACES.get(p[2].decode("utf8"), p[2].decode("utf8"))
+            for p in players
+        ),
+        results=tuple({1: "Win", 2: "Loss"}.get(p[8]) for p in players),
+        teams=tuple(p[5] for p in players),
+        unix_timestamp=utils.windows_to_unix(details[5]),
+    )
+
+
 class Map(Resource):
     def __init__(self, map_file, filename=None, region=None, map_hash=None, **options):
         super().__init__(map_file, filename, **options)
@@ -992,6 +1528,10 @@ class Map(Resource):
             for dependency_node in doc_info.findall("Dependencies/Value"):
                 self.dependencies.append(dependency_node.text)
 
+        # Everything is read, files read in place don't need to stay open
+        if isinstance(self.archive.file, utils.PositionalFile):
+            self.archive.file.close()
+
     @classmethod
     def get_url(cls, region, map_hash):
         """Builds a download URL for the map from its components."""
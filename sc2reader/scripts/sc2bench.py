@@ -0,0 +1,268 @@
+"""
+Benchmarks replay loading so changes to the readers, datapacks, and engine
+can be checked for performance regressions.
+
+    sc2bench [--levels 0,1,2,3,4] [--engine both] [--repeat 3]
+             [--output results.json] [--compare baseline.json] [PATHS..]
+
+Every replay under the given paths, test_replays by default, is loaded at
+each of the comma separated load levels with and without the default engine
+plugins. Throughput is
+reported per replay build in replays, events, and megabytes per second along
+with the peak resident memory of each configuration. Each configuration runs
+in a fresh process so its peak memory isn't inflated by the ones before it.
+
+Results are written out as JSON. Given a baseline from an earlier run, any
+configuration that got slower or used more memory than the threshold allows
+is reported and the script exits with a non-zero status.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Not available on Windows
+
+import sc2reader
+from sc2reader.log_utils import get_logger
+
+
+def get_peak_rss():
+    """Returns the peak resident memory of this process in bytes, if known."""
+    if resource is None:
+        return None
+
+    # Linux reports kilobytes, macOS bytes
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def get_result(level, engine, build, replays, errors, seconds, events, size):
+    return dict(
+        level=level,
+        engine=engine,
+        build=build,
+        replays=replays,
+        errors=errors,
+        seconds=seconds,
+        events=events,
+        bytes=size,
+        replays_per_second=replays / seconds if seconds else 0.0,
+        events_per_second=events / seconds if seconds else 0.0,
+        mb_per_second=size / 1048576 / seconds if seconds else 0.0,
+        peak_rss=None,
+    )
+
+
+def run_configuration(paths, level, engine, repeat=1):
+    """
+    Loads each replay ``repeat`` times at the given load level, with or
+    without the default engine plugins, and returns a result for each build
+    and one for all of the builds, ``"all"``, which carries the peak memory.
+    Replays are timed by their fastest load. Replays that fail to load are
+    logged, counted as errors, and left out of the throughput. Missing
+    replays raise FileNotFoundError.
+    """
+    logger = get_logger(run_configuration)
+    totals = dict()
+    for path in paths:
+        try:
+            build = sc2reader.probe(path).release_string
+        except FileNotFoundError:
+            raise
+        except Exception:
+            logger.exception("Unable to probe %s", path)
+            build = "unknown"
+
+        seconds = None
+        try:
+            for i in range(repeat):
+                start = time.perf_counter()
+                replay = sc2reader.load_replay(
+                    path,
+                    load_level=level,
+                    engine=sc2reader.engine if engine else None,
+                )
+                elapsed = time.perf_counter() - start
+                seconds = elapsed if seconds is None else min(seconds, elapsed)
+        except FileNotFoundError:
+            raise
+        except Exception:
+            logger.exception("Unable to load %s at level %s", path, level)
+            seconds = None
+
+        total = totals.setdefault(build, [0, 0, 0.0, 0, 0])
+        if seconds is None:
+            total[1] += 1
+        else:
+            total[0] += 1
+            total[2] += seconds
+            total[3] += len(replay.events)
+            total[4] += os.path.getsize(path)
+
+    results = [
+        get_result(level, engine, build, *total)
+        for build, total in sorted(totals.items())
+    ]
+    overall = [sum(total[i] for total in totals.values()) for i in range(5)]
+    results.append(get_result(level, engine, "all", *overall))
+    results[-1]["peak_rss"] = get_peak_rss()
+    return results
+
+
+def get_levels(value):
+    """Returns the load levels in a comma separated list such as 0,2,4."""
+    levels = [int(level) for level in value.split(",")]
+    for level in levels:
+        if level not in range(5):
+            raise argparse.ArgumentTypeError(f"{level} isn't a load level, 0 to 4")
+    return levels
+
+
+def compare_results(results, baseline, threshold=0.1):
+    """
+    Returns a message for each result that is more than ``threshold`` slower,
+    in replays per second, or heavier, in peak memory, than the matching
+    result in the baseline.
+    """
+    baseline = {
+        (result["level"], result["engine"], result["build"]): result
+        for result in baseline
+    }
+
+    regressions = list()
+    for result in results:
+        key = (result["level"], result["engine"], result["build"])
+        if key not in baseline:
+            continue
+
+        before, after = baseline[key], result
+        name = "level {} {} engine, build {}".format(
+            key[0], "with" if key[1] else "without", key[2]
+        )
+        slowest = before["replays_per_second"] * (1 - threshold)
+        if before["replays_per_second"] and after["replays_per_second"] < slowest:
+            regressions.append(
+                "{}: {:.1f} replays/s, was {:.1f}".format(
+                    name, after["replays_per_second"], before["replays_per_second"]
+                )
+            )
+        if (
+            before["peak_rss"]
+            and after["peak_rss"]
+            and after["peak_rss"] > before["peak_rss"] * (1 + threshold)
+        ):
+            regressions.append(
+                "{}: {:.1f} MB peak memory, was {:.1f}".format(
+                    name, after["peak_rss"] / 1048576, before["peak_rss"] / 1048576
+                )
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmarks replay loading per build, load level, and engine."
+    )
+    parser.add_argument(
+        "paths",
+        metavar="path",
+        type=str,
+        nargs="*",
+        default=["test_replays"],
+        help="Replay files or folders to benchmark, test_replays by default",
+    )
+    parser.add_argument(
+        "--levels",
+        type=get_levels,
+        default=[0, 1, 2, 3, 4],
+        help="Comma separated load levels to benchmark, 0,1,2,3,4 by default",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["both", "on", "off"],
+        default="both",
+        help="Run the default engine plugins, skip them, or benchmark both",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Times to load each replay, the fastest load is kept",
+    )
+    parser.add_argument(
+        "--output", type=str, help="Write the JSON results here instead of stdout"
+    )
+    parser.add_argument(
+        "--compare", type=str, help="A JSON results file to check for regressions"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Fraction a result may get worse before it is a regression",
+    )
+    args = parser.parse_args()
+
+    paths = list()
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(sorted(sc2reader.utils.get_files(path, extension="SC2Replay")))
+        else:
+            paths.append(path)
+
+    engines = dict(both=[False, True], on=[True], off=[False])[args.engine]
+    results = list()
+    context = multiprocessing.get_context("spawn")
+    for level in args.levels:
+        for engine in engines:
+            with context.Pool(1) as pool:
+                results.extend(
+                    pool.apply(run_configuration, (paths, level, engine, args.repeat))
+                )
+            total = results[-1]
+            print(
+                "level {} {} engine: {:.1f} replays/s, {:.0f} events/s, "
+                "{:.2f} MB/s".format(
+                    level,
+                    "with" if engine else "without",
+                    total["replays_per_second"],
+                    total["events_per_second"],
+                    total["mb_per_second"],
+                ),
+                file=sys.stderr,
+            )
+
+    report = dict(
+        sc2reader=sc2reader.__version__,
+        python=platform.python_version(),
+        platform=platform.platform(),
+        repeat=args.repeat,
+        results=results,
+    )
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare_results(
+                results, json.load(baseline)["results"], args.threshold
+            )
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 import binascii
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import hashlib
+import mmap
 import os
 import json
+import threading
 from datetime import timedelta, datetime
 
 from sc2reader.log_utils import loggable
@@ -108,6 +113,111 @@ def get_real_type(teams):
         return "v".join(str(size) for size in sorted(team_sizes))
 
 
+class PositionalFile:
+    """
+    A read only file object for archives that are read in place. Only the
+    bytes asked for are read, with ``os.pread`` where available, so the
+    header, tables, and requested members of an archive are all that is
+    read from disk.
+
+    Copies share the open file but keep their own position, so they can be
+    read from several threads at once. The file can be closed between reads
+    and opened again with :meth:`reopen`.
+    """
+
+    def __init__(self, path):
+        self.name = path
+        self.raw = open(path, "rb", buffering=0)
+        self.position = 0
+        self.lock = threading.Lock()
+
+    def fileno(self):
+        return self.raw.fileno()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += os.fstat(self.fileno()).st_size
+        self.position = offset
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = max(os.fstat(self.fileno()).st_size - self.position, 0)
+
+        if hasattr(os, "pread"):
+            data = os.pread(self.fileno(), size, self.position)
+        else:
+            with self.lock:
+                self.raw.seek(self.position)
+                data = self.raw.read(size)
+
+        self.position += len(data)
+        return data
+
+    @property
+    def closed(self):
+        return self.raw.closed
+
+    def close(self):
+        self.raw.close()
+
+    def reopen(self):
+        if self.raw.closed:
+            self.raw = open(self.name, "rb", buffering=0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BufferFile:
+    """
+    A read only file object over a buffer, such as a memoryview of a memory
+    map. Reads copy only the bytes asked for, so each thread extracting from
+    an archive can have its own position in the one buffer.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += len(self.buffer)
+        self.position = offset
+        return self.position
+
+    def read(self, size=-1):
+        end = len(self.buffer) if size is None or size < 0 else self.position + size
+        data = bytes(self.buffer[self.position : end])
+        self.position += len(data)
+        return data
+
+
 def extract_data_file(data_file, archive):
     def recovery_attempt():
         try:
@@ -145,6 +255,70 @@ def extract_data_file(data_file, archive):
         raise MPQError(f"Unable to extract file: {data_file}", e)
 
 
+def extract_data_files(data_files, archive, max_workers=None):
+    """
+    Extracts several files from the archive at once, decompressing them on a
+    pool of threads. The bz2 and zlib decompressors release the GIL so this
+    makes use of idle cores when only one replay is being loaded. Returns a
+    dict of the extracted file data keyed by file name.
+
+    Each thread reads from its own view of the archive contents, mpyq
+    archives aren't safe to read from several threads at once. Memory maps
+    and in memory files are shared by the threads rather than copied, and
+    archives read in place with a :class:`PositionalFile` aren't read in
+    full.
+    """
+    buffer = None
+    if isinstance(archive.file, mmap.mmap):
+        buffer = memoryview(archive.file)
+    elif hasattr(archive.file, "getvalue"):
+        # Shares the buffer of the BytesIO until it is written to
+        buffer = memoryview(archive.file.getvalue())
+    elif not isinstance(archive.file, PositionalFile):
+        archive.file.seek(0)
+        buffer = memoryview(archive.file.read())
+
+    def extract(data_file):
+        view = copy.copy(archive)
+        if buffer is None:
+            view.file = copy.copy(archive.file)
+        else:
+            view.file = BufferFile(buffer)
+        return extract_data_file(data_file, view)
+
+    try:
+        with ThreadPoolExecutor(max_workers) as executor:
+            extracted = list(executor.map(extract, data_files))
+    finally:
+        # Memory maps can't be closed while a view of them is held
+        if buffer is not None:
+            buffer.release()
+    return dict(zip(data_files, extracted))
+
+
+def get_file_hash(file_object, algorithm="sha256"):
+    """
+    Returns the hex digest of the full contents of a seekable file-like
+    object, sha256 unless another ``hashlib`` algorithm is named. Memory
+    maps and BytesIO objects are hashed in place instead of being read
+    into a new byte string.
+    """
+    if isinstance(file_object, PositionalFile):
+        # Read from a new handle as the positional file may be closed
+        with open(file_object.name, "rb") as path_file:
+            return hashlib.new(algorithm, path_file.read()).hexdigest()
+    elif isinstance(file_object, mmap.mmap):
+        contents = memoryview(file_object)
+    elif hasattr(file_object, "getbuffer"):
+        contents = file_object.getbuffer()
+    else:
+        file_object.seek(0)
+        return hashlib.new(algorithm, file_object.read()).hexdigest()
+
+    with contents:
+        return hashlib.new(algorithm, contents).hexdigest()
+
+
 def get_files(
     path, exclude=list(), depth=-1, followlinks=False, extension=None, **extras
 ):
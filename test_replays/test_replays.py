@@ -1,5 +1,21 @@
+import argparse
+import asyncio
 import datetime
+import functools
+import gc
+import glob
+import hashlib
+import http.server
+import io
 import json
+import marshal
+import mmap
+import operator
+import os
+import pickle
+import tempfile
+import threading
+import tracemalloc
 from xml.dom import minidom
 
 # Newer unittest features aren't built in for python 2.6
@@ -16,8 +32,18 @@ except ImportError:
     from io import StringIO
 
 import sc2reader
-from sc2reader.exceptions import CorruptTrackerFileError
-from sc2reader.events.game import GameEvent
+from sc2reader import data
+from sc2reader.data import LazyBuilds, datapacks
+from sc2reader.decoders import BitPackedDecoder
+from sc2reader.exceptions import CorruptTrackerFileError, LoadError
+from sc2reader.events.game import (
+    CameraEvent,
+    CommandEvent,
+    GameEvent,
+    SelectionEvent,
+    TargetPointCommandEvent,
+)
+from sc2reader.events.tracker import UnitBornEvent
 from sc2reader.objects import Player
 
 sc2reader.log_utils.log_to_console("INFO")
@@ -699,6 +725,591 @@ class TestReplays(unittest.TestCase):
         factory = sc2reader.factories.SC2Factory()
         replay = factory.load_replay(replayfilename)
 
+    def test_memory_map(self):
+        replayfilename = "test_replays/4.1.2.60604/1.SC2Replay"
+        factory = sc2reader.factories.SC2Factory()
+        replay = factory.load_replay(replayfilename)
+        mapped = factory.load_replay(replayfilename, memory_map=True)
+        self.assertIsInstance(mapped.archive.file, mmap.mmap)
+        self.assertEqual(mapped.filehash, replay.filehash)
+        self.assertEqual(len(mapped.events), len(replay.events))
+        self.assertEqual(mapped.players[0].name, replay.players[0].name)
+
+    def test_file_backed(self):
+        replayfilename = "test_replays/4.1.2.60604/1.SC2Replay"
+        factory = sc2reader.factories.SC2Factory()
+        replay = factory.load_replay(replayfilename)
+        backed = factory.load_replay(replayfilename, file_backed=True)
+        self.assertIsInstance(backed.archive.file, sc2reader.utils.PositionalFile)
+        self.assertEqual(backed.filehash, replay.filehash)
+        self.assertEqual(len(backed.events), len(replay.events))
+        self.assertEqual(backed.players[0].name, replay.players[0].name)
+
+        backed = factory.load_replay(replayfilename, file_backed=True, load_level=1)
+        self.assertLess(backed.archive.file.tell(), os.path.getsize(replayfilename))
+
+        # The file is only open while loading
+        self.assertTrue(backed.archive.file.closed)
+        self.assertEqual(backed.filehash, replay.filehash)
+        backed.load(4)
+        self.assertTrue(backed.archive.file.closed)
+        self.assertEqual(len(backed.events), len(replay.events))
+
+        # Lazy replays close it when they are dropped
+        backed = factory.load_replay(replayfilename, file_backed=True, lazy=True)
+        backed_file = backed.archive.file
+        self.assertFalse(backed_file.closed)
+        self.assertEqual(len(backed.game_events), len(replay.game_events))
+        del backed
+        gc.collect()
+        self.assertTrue(backed_file.closed)
+
+    def test_aload_replays(self):
+        directory = os.path.abspath("test_replays/4.1.2.60604")
+        handler = functools.partial(
+            http.server.SimpleHTTPRequestHandler, directory=directory
+        )
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = "http://127.0.0.1:{}/1.SC2Replay".format(server.server_address[1])
+
+        async def load():
+            replay = await sc2reader.aload_replay(url, load_level=2)
+            sources = [url, "test_replays/4.7.0.70154/1.SC2Replay", url]
+            replays = [
+                r
+                async for r in sc2reader.aload_replays(
+                    sources, concurrency=2, ordered=True, load_level=2
+                )
+            ]
+            return replay, replays
+
+        try:
+            replay, replays = asyncio.run(load())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        expected = sc2reader.load_replay(
+            "test_replays/4.1.2.60604/1.SC2Replay", load_level=2
+        )
+        self.assertEqual(replay.filehash, expected.filehash)
+        self.assertEqual(
+            [r.filename for r in replays],
+            [url, "test_replays/4.7.0.70154/1.SC2Replay", url],
+        )
+        self.assertEqual(replays[2].players[0].name, expected.players[0].name)
+
+    def test_iter_events(self):
+        replayfilename = "test_replays/4.1.2.60604/1.SC2Replay"
+        replay = sc2reader.load_replay(replayfilename, engine=None)
+        events = sc2reader.iter_events(replayfilename)
+        self.assertEqual(
+            [(e.frame, e.name) for e in events],
+            [(e.frame, e.name) for e in replay.events],
+        )
+
+        events = sc2reader.iter_events(replayfilename, kinds=("tracker",))
+        self.assertEqual(
+            [(e.frame, e.name) for e in events],
+            [(e.frame, e.name) for e in replay.tracker_events],
+        )
+
+        # Files read in place are opened again to extract the events
+        backed = sc2reader.load_replay(replayfilename, file_backed=True, load_level=1)
+        self.assertTrue(backed.archive.file.closed)
+        events = backed.iter_events()
+        self.assertTrue(backed.archive.file.closed)
+        self.assertEqual(
+            [(e.frame, e.name) for e in events],
+            [(e.frame, e.name) for e in replay.events],
+        )
+        events = sc2reader.iter_events(replayfilename, file_backed=True)
+        self.assertEqual(len(list(events)), len(replay.events))
+
+    def test_event_types(self):
+        replayfilename = "test_replays/4.1.2.60604/1.SC2Replay"
+        event_types = {SelectionEvent, TargetPointCommandEvent, UnitBornEvent}
+        replay = sc2reader.load_replay(replayfilename, engine=None)
+        filtered = sc2reader.load_replay(
+            replayfilename, engine=None, event_types=event_types
+        )
+        self.assertTrue(filtered.events)
+        self.assertEqual(
+            [(e.frame, e.name) for e in filtered.events],
+            [
+                (e.frame, e.name)
+                for e in replay.events
+                if isinstance(e, tuple(event_types))
+            ],
+        )
+        self.assertFalse(filtered.messages)
+        self.assertEqual(len(filtered.players), len(replay.players))
+
+    def test_skip_parsers(self):
+        # A mis-sized skip parser would throw the following events out of step
+        for replayfilename in [
+            "test_replays/1.0.0.16117/1.SC2Replay",
+            "test_replays/1.2.0.17326/1v1 with Referee.SC2Replay",
+            "test_replays/1.5.3.23260/Deadlock Ridge (110).SC2Replay",
+            "test_replays/2.0.0.24247/Cloud Kingdom LE (13).SC2Replay",
+            "test_replays/2.0.10.26490/replay26490.SC2Replay",
+            "test_replays/2.1.3.28667/Habitation Station LE (54).SC2Replay",
+            "test_replays/3.0.0.38996/1.SC2Replay",
+            "test_replays/4.3.0.64469/1.SC2Replay",
+            "test_replays/5.0.0.80949/2020-07-28 - (T)Ocrucius VS (Z)Rairden.SC2Replay",
+        ]:
+            replay = sc2reader.load_replay(replayfilename, engine=None)
+            for event_type in [CameraEvent, CommandEvent, SelectionEvent]:
+                filtered = sc2reader.load_replay(
+                    replayfilename, engine=None, event_types={event_type}
+                )
+                self.assertEqual(
+                    [(e.frame, e.pid, e.name) for e in filtered.events],
+                    [
+                        (e.frame, e.pid, e.name)
+                        for e in replay.events
+                        if isinstance(e, event_type)
+                    ],
+                    replayfilename,
+                )
+
+        class Reader(sc2reader.readers.GameEventsReader_80669):
+            def camera_update_event(self, data):
+                return super().camera_update_event(data)
+
+        reader = sc2reader.readers.GameEventsReader_80669()
+        skip_dispatch = reader.get_skip_dispatch()
+        self.assertEqual(skip_dispatch[49].__name__, "skip_camera_update_event")
+        self.assertEqual(skip_dispatch[27].__name__, "skip_command_event")
+        self.assertEqual(skip_dispatch[22], reader.EVENT_DISPATCH[22][1])
+        dispatch = reader.get_event_dispatch([CommandEvent])
+        self.assertEqual(dispatch[27][1], reader.command_event)
+        self.assertEqual(dispatch[49], (None, skip_dispatch[49]))
+
+        # Readers that change a layout don't inherit the old skip parser
+        reader = Reader()
+        self.assertEqual(reader.get_skip_dispatch()[49], reader.camera_update_event)
+
+    def test_max_frame(self):
+        replayfilename = "test_replays/4.7.0.70154/1.SC2Replay"
+        replay = sc2reader.load_replay(replayfilename)
+        bounded = sc2reader.load_replay(replayfilename, until_second=60)
+        self.assertEqual(bounded.max_frame, int(60 * 16 * 1.4))
+        self.assertEqual(bounded.frames, replay.frames)
+        self.assertEqual(
+            [(e.frame, e.name) for e in bounded.events],
+            [(e.frame, e.name) for e in replay.events if e.frame <= bounded.max_frame],
+        )
+        self.assertTrue(bounded.game_events)
+        self.assertTrue(bounded.tracker_events)
+
+        bounded = sc2reader.load_replay(replayfilename, max_frame=0, until_second=120)
+        self.assertEqual(bounded.max_frame, 0)
+        self.assertTrue(all(e.frame == 0 for e in bounded.events))
+
+    def test_parse_cache(self):
+        replayfilename = "test_replays/4.7.0.70154/1.SC2Replay"
+        replay = sc2reader.load_replay(replayfilename)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            factory = sc2reader.factories.ParseCachedSC2Factory(cache_dir)
+            factory.load_replay(replayfilename)
+            bucket_dir = os.path.join(cache_dir, replay.filehash[:2])
+            self.assertEqual(len(os.listdir(bucket_dir)), 1)
+
+            cached = factory.load_replay(replayfilename)
+            self.assertEqual(
+                [(e.frame, e.name) for e in cached.events],
+                [(e.frame, e.name) for e in replay.events],
+            )
+            self.assertEqual(cached.players[0].name, replay.players[0].name)
+            self.assertEqual(len(cached.objects), len(replay.objects))
+
+            bounded = factory.load_replay(replayfilename, max_frame=100)
+            self.assertTrue(all(e.frame <= 100 for e in bounded.events))
+
+            tabled = factory.load_replay(replayfilename, tracker_table=True)
+            self.assertIsNotNone(tabled.tracker_table)
+            self.assertEqual(len(tabled.tracker_table), len(replay.tracker_events))
+            cached = factory.load_replay(replayfilename)
+            self.assertIsNone(cached.tracker_table)
+            self.assertEqual(len(os.listdir(bucket_dir)), 3)
+
+    def test_load_replays_workers(self):
+        replayfilenames = [
+            "test_replays/4.7.0.70154/1.SC2Replay",
+            "test_replays/missing.SC2Replay",
+            "test_replays/4.1.2.60604/1.SC2Replay",
+        ]
+        results = list(sc2reader.load_replays(replayfilenames, workers=2, ordered=True))
+        self.assertEqual(len(results), 3)
+        self.assertIsInstance(results[1], LoadError)
+        self.assertEqual(results[1].source, replayfilenames[1])
+        self.assertIsInstance(results[1].error, FileNotFoundError)
+        for replayfilename, replay in zip(replayfilenames[::2], results[::2]):
+            expected = sc2reader.load_replay(replayfilename)
+            self.assertEqual(replay.filename, replayfilename)
+            self.assertEqual(len(replay.events), len(expected.events))
+            self.assertEqual(replay.players[0].name, expected.players[0].name)
+
+        results = sc2reader.load_replays(
+            "test_replays/4.7.0.70154", workers=2, chunksize=2, load_level=1
+        )
+        self.assertEqual(
+            sorted(replay.filename for replay in results),
+            sorted(glob.glob("test_replays/4.7.0.70154/*.SC2Replay")),
+        )
+
+    def test_map_replays(self):
+        replayfilenames = [
+            "test_replays/4.7.0.70154/1.SC2Replay",
+            "test_replays/4.1.2.60604/1.SC2Replay",
+        ]
+        frames = [sc2reader.load_replay(path).frames for path in replayfilenames]
+        self.assertEqual(
+            list(sc2reader.map_replays(replayfilenames, replay_frames, load_level=0)),
+            frames,
+        )
+        self.assertEqual(
+            list(
+                sc2reader.map_replays(
+                    replayfilenames, replay_frames, workers=2, ordered=True
+                )
+            ),
+            frames,
+        )
+        self.assertEqual(
+            sc2reader.reduce_replays(
+                replayfilenames + ["test_replays/missing.SC2Replay"],
+                replay_frames,
+                operator.add,
+                0,
+                workers=2,
+            ),
+            sum(frames),
+        )
+
+        # Errors from fn aren't reported as load errors
+        for workers in [None, 2]:
+            with self.assertRaises(ZeroDivisionError):
+                list(
+                    sc2reader.map_replays(
+                        replayfilenames, replay_error, workers=workers, load_level=0
+                    )
+                )
+
+    def test_tracker_table(self):
+        replayfilename = "test_replays/4.7.0.70154/1.SC2Replay"
+        replay = sc2reader.load_replay(replayfilename)
+        tabled = sc2reader.load_replay(replayfilename, tracker_table=True)
+        table = tabled.tracker_table
+        self.assertEqual(len(table), len(replay.tracker_events))
+
+        stats_events = [
+            e for e in replay.tracker_events if e.name == "PlayerStatsEvent"
+        ]
+        columns = table.columns["PlayerStatsEvent"]
+        self.assertEqual(list(columns["frame"]), [e.frame for e in stats_events])
+        self.assertEqual(list(columns["pid"]), [e.pid for e in stats_events])
+        self.assertEqual(
+            list(columns["minerals_current"]),
+            [e.minerals_current for e in stats_events],
+        )
+
+        born_events = [e for e in replay.tracker_events if e.name == "UnitBornEvent"]
+        columns = table.columns["UnitBornEvent"]
+        self.assertEqual(list(columns["unit_id"]), [e.unit_id for e in born_events])
+        self.assertEqual(
+            [table.unit_type_names[index] for index in columns["unit_type"]],
+            [e.unit_type_name for e in born_events],
+        )
+
+        for event, view in zip(replay.tracker_events, tabled.tracker_events):
+            self.assertEqual(str(event), str(view))
+        self.assertEqual(len(tabled.objects), len(replay.objects))
+
+    def test_lazy_datapacks(self):
+        builds = LazyBuilds({"70154": ("LotV", "70154")})
+        self.assertEqual(list(builds), ["70154"])
+        build = builds["70154"]
+        self.assertIs(builds["70154"], build)
+        self.assertEqual(build.id, "70154")
+        self.assertTrue(build.units)
+
+        replay = sc2reader.load_replay("test_replays/4.7.0.70154/1.SC2Replay")
+        self.assertIs(replay.datapack, datapacks["LotV"]["70154"])
+
+    def test_load_upgrade(self):
+        path = "test_replays/4.7.0.70154/1.SC2Replay"
+        full = sc2reader.load_replay(path)
+        replay = sc2reader.load_replay(path, load_level=1)
+        archive = replay.archive
+        self.assertEqual(replay.events, [])
+
+        replay.load(2, engine=None)
+        players = list(replay.players)
+        replay.load(4)
+        self.assertEqual(replay.load_level, 4)
+        self.assertIs(replay.archive, archive)
+        self.assertEqual(replay.players, players)
+        self.assertEqual(
+            [str(event) for event in replay.events],
+            [str(event) for event in full.events],
+        )
+        self.assertEqual(len(replay.objects), len(full.objects))
+        self.assertEqual(
+            [len(player.events) for player in replay.players],
+            [len(player.events) for player in full.players],
+        )
+
+        replay = sc2reader.load_replay(path, do_tracker_events=False)
+        self.assertEqual(replay.tracker_events, [])
+        replay.load(4)
+        self.assertEqual(len(replay.tracker_events), len(full.tracker_events))
+        self.assertEqual(len(replay.events), len(full.events))
+
+    def test_gameheart_load_upgrade(self):
+        from sc2reader.engine import GameEngine
+        from sc2reader.engine.plugins import (
+            APMTracker,
+            ContextLoader,
+            GameHeartNormalizer,
+            SelectionTracker,
+        )
+
+        def get_engine():
+            return GameEngine(
+                plugins=[
+                    ContextLoader(),
+                    APMTracker(),
+                    SelectionTracker(),
+                    GameHeartNormalizer(),
+                ]
+            )
+
+        path = "test_replays/gameheart/gameheart.SC2Replay"
+        full = sc2reader.load_replay(path, engine=get_engine())
+        replay = sc2reader.load_replay(path, load_level=3, engine=get_engine())
+        replay.load(4, engine=get_engine())
+        self.assertEqual(replay.frame_offset, full.frame_offset)
+        self.assertEqual(replay.frames, full.frames)
+        self.assertEqual(
+            [(event.frame, str(event)) for event in replay.events],
+            [(event.frame, str(event)) for event in full.events],
+        )
+        self.assertEqual(
+            [player.name for player in replay.players],
+            [player.name for player in full.players],
+        )
+
+    def test_lazy_raw_data(self):
+        path = "test_replays/4.7.0.70154/1.SC2Replay"
+        full = sc2reader.load_replay(path)
+        replay = sc2reader.load_replay(path, lazy=True)
+        self.assertNotIn("replay.tracker.events", dict.keys(replay.raw_data))
+
+        self.assertEqual(len(replay.tracker_events), len(full.tracker_events))
+        self.assertIn("replay.tracker.events", dict.keys(replay.raw_data))
+        self.assertNotIn("replay.game.events", dict.keys(replay.raw_data))
+        self.assertEqual(len(replay.game_events), len(full.game_events))
+
+        replay.load(4)
+        self.assertEqual(
+            [str(event) for event in replay.events],
+            [str(event) for event in full.events],
+        )
+        self.assertEqual(len(replay.objects), len(full.objects))
+
+        # Copies can't decode from the archive, the files are decoded first
+        replay = pickle.loads(pickle.dumps(sc2reader.load_replay(path, lazy=True)))
+        self.assertEqual(len(replay.game_events), len(full.game_events))
+        self.assertEqual(len(replay.tracker_events), len(full.tracker_events))
+        self.assertEqual(len(replay.message_events), len(full.message_events))
+
+        replays = list(sc2reader.load_replays([path], workers=1, lazy=True))
+        self.assertEqual(len(replays[0].game_events), len(full.game_events))
+
+    def test_extract_threads(self):
+        path = "test_replays/4.7.0.70154/1.SC2Replay"
+        full = sc2reader.load_replay(path)
+        replay = sc2reader.load_replay(path, extract_threads=4)
+        self.assertEqual(replay._extracted, {})
+        self.assertEqual(
+            [str(event) for event in replay.events],
+            [str(event) for event in full.events],
+        )
+
+    def test_timings(self):
+        path = "test_replays/4.7.0.70154/1.SC2Replay"
+        self.assertIsNone(sc2reader.load_replay(path).timings)
+
+        replay = sc2reader.load_replay(path, timings=True)
+        for phase in [
+            "mpq_open",
+            "header",
+            "replay.details",
+            "replay.game.events",
+            "load_players",
+            "sort_game_events",
+            "engine",
+        ]:
+            self.assertGreaterEqual(replay.timings[phase]["time"], 0)
+        self.assertIsNone(replay.timings["engine"]["memory"])
+
+        tracemalloc.start()
+        try:
+            replay = sc2reader.load_replay(path, load_level=1, timings=True)
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(replay.timings["replay.details"]["memory"], 0)
+        self.assertNotIn("replay.game.events", replay.timings)
+
+    def test_bench(self):
+        from sc2reader.scripts import sc2bench
+
+        path = "test_replays/4.7.0.70154/1.SC2Replay"
+        results = sc2bench.run_configuration([path], 2, False)
+        self.assertEqual(
+            [result["build"] for result in results], ["4.7.0.70154", "all"]
+        )
+        self.assertEqual(results[1]["replays"], 1)
+        self.assertEqual(results[1]["errors"], 0)
+        self.assertEqual(results[1]["bytes"], os.path.getsize(path))
+
+        baseline = [
+            dict(results[1], replays_per_second=results[1]["replays_per_second"] * 2)
+        ]
+        self.assertEqual(sc2bench.compare_results(results, results), [])
+        self.assertEqual(len(sc2bench.compare_results(results, baseline)), 1)
+
+        with self.assertRaises(FileNotFoundError):
+            sc2bench.run_configuration(["test_replays/missing.SC2Replay"], 2, False)
+
+        self.assertEqual(sc2bench.get_levels("0,4"), [0, 4])
+        with self.assertRaises(argparse.ArgumentTypeError):
+            sc2bench.get_levels("5")
+
+    def test_filehash(self):
+        path = "test_replays/4.7.0.70154/1.SC2Replay"
+        with open(path, "rb") as replay_file:
+            contents = replay_file.read()
+
+        replay = sc2reader.load_replay(path, load_level=0)
+        self.assertIsNone(replay._filehash)
+        self.assertEqual(replay.filehash, hashlib.sha256(contents).hexdigest())
+
+        replay = sc2reader.load_replay(path, load_level=0, hash_algorithm="blake2b")
+        self.assertEqual(replay.filehash, hashlib.blake2b(contents).hexdigest())
+
+        replay = sc2reader.load_replay(path, load_level=0, filehash="known")
+        self.assertEqual(replay.filehash, "known")
+
+        # The caller's own file objects may be closed once loaded
+        with open(path, "rb") as replay_file:
+            replay = sc2reader.load_replay(replay_file, load_level=1)
+        self.assertEqual(replay.filehash, hashlib.sha256(contents).hexdigest())
+
+        replay_file = io.BytesIO(contents)
+        replay = sc2reader.load_replay(replay_file, load_level=1)
+        replay_file.close()
+        self.assertEqual(replay.filehash, hashlib.sha256(contents).hexdigest())
+
+    def test_probe(self):
+        path = "test_replays/4.7.0.70154/1.SC2Replay"
+        probe = sc2reader.probe(path)
+        replay = sc2reader.load_replay(path, load_level=2)
+        self.assertEqual(probe.filename, path)
+        self.assertEqual(probe.build, replay.build)
+        self.assertEqual(probe.base_build, replay.base_build)
+        self.assertEqual(probe.frames, replay.frames)
+        self.assertEqual(probe.length, replay.length)
+        self.assertEqual(probe.map_name, replay.map_name)
+        self.assertEqual(probe.unix_timestamp, replay.unix_timestamp)
+        self.assertEqual(probe.players, tuple(p.name for p in replay.players))
+        self.assertEqual(probe.races, tuple(p.play_race for p in replay.players))
+        self.assertEqual(probe.results, tuple(p.result for p in replay.players))
+
+        with open(path, "rb") as replay_file:
+            self.assertEqual(sc2reader.probe(replay_file)[1:], probe[1:])
+        with self.assertRaises(AttributeError):
+            probe.build = 0
+
+        probes = list(sc2reader.probe_replays("test_replays/4.7.0.70154"))
+        self.assertIn(probe, probes)
+
+    def test_default_readers_shared(self):
+        first = sc2reader.load_replay("test_replays/4.7.0.70154/1.SC2Replay")
+        second = sc2reader.load_replay("test_replays/4.7.0.70154/1.SC2Replay")
+        self.assertIs(first.datapack, second.datapack)
+        self.assertIs(
+            first._get_reader("replay.game.events"),
+            second._get_reader("replay.game.events"),
+        )
+
+        # Readers registered on a replay still take preference
+        reader = sc2reader.readers.GameEventsReader_80669()
+        second.register_reader("replay.game.events", reader)
+        self.assertIs(second._get_reader("replay.game.events"), reader)
+        self.assertIsNot(first._get_reader("replay.game.events"), reader)
+
+    def test_shared_datapack_records(self):
+        first = data.load_build("LotV", "77379")
+        second = data.load_build("LotV", "80949")
+        shared = [
+            key for key in first.units if first.units[key] is second.units.get(key)
+        ]
+        self.assertTrue(shared)
+        for key, unit in first.units.items():
+            other = second.units.get(key)
+            if other is not None and other is not unit:
+                self.assertNotEqual(vars(unit), vars(other))
+
+        self.assertTrue(
+            any(
+                abil is second.abilities.get(key)
+                for key, abil in first.abilities.items()
+            )
+        )
+
+    def test_compiled_datapacks(self):
+        def build_data(build):
+            return sorted(
+                (str(key), unit.__dict__) for key, unit in build.units.items()
+            ), [(key, abil.name) for key, abil in build.abilities.items()]
+
+        compiled_builds = data._compiled_builds
+        cache_dir = os.environ.get("SC2READER_CACHE_DIR")
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                os.environ["SC2READER_CACHE_DIR"] = temp_dir
+                path = data.get_compiled_path()
+                self.assertTrue(path.startswith(temp_dir))
+
+                # Compiled on first use
+                data._compiled_builds = None
+                build = data.load_compiled_build("LotV", "70154")
+                expected = data.load_build("LotV", "70154")
+                self.assertEqual(build_data(build), build_data(expected))
+                with open(path, "rb") as compiled_file:
+                    header, builds = marshal.loads(compiled_file.read())
+                self.assertEqual(header, data.get_compiled_header())
+                self.assertIn(("LotV", "70154"), builds)
+
+                # Compiled again once the data files change
+                stale_header = header[:-1] + ([],)
+                data.write_compiled_builds(path, stale_header, dict())
+                data._compiled_builds = None
+                self.assertIn(("LotV", "70154"), data.get_compiled_builds())
+                with open(path, "rb") as compiled_file:
+                    header, builds = marshal.loads(compiled_file.read())
+                self.assertEqual(header, data.get_compiled_header())
+        finally:
+            data._compiled_builds = compiled_builds
+            if cache_dir is None:
+                os.environ.pop("SC2READER_CACHE_DIR", None)
+            else:
+                os.environ["SC2READER_CACHE_DIR"] = cache_dir
+
     def test_game_event_string(self):
         time = "00.01"
         # Global
@@ -792,6 +1403,101 @@ class TestGameEngine(unittest.TestCase):
         self.assertEqual(replay.plugin_result["TestPlugin1"], (1, dict(msg="Fail!")))
         self.assertEqual(replay.plugin_result["TestPlugin2"], (0, dict()))
 
+    def test_dispatch_tables(self):
+        plugin1, plugin2 = self.TestPlugin1(), self.TestPlugin2()
+        engine = sc2reader.engine.GameEngine(plugins=[plugin1, plugin2])
+        for i in range(2):
+            replay = self.MockReplay([self.TestEvent("a")])
+            engine.run(replay)
+            self.assertEqual("".join(str(e) for e in replay.engine_events), "bdecaf")
+        self.assertEqual(set(engine._dispatch_tables), {(plugin1, plugin2), (plugin2,)})
+        self.assertEqual(
+            engine._dispatch_tables[(plugin2,)][self.TestEvent],
+            [plugin2.handleTestEvent],
+        )
+
+    def test_profile(self):
+        engine = sc2reader.engine.GameEngine(
+            plugins=[self.TestPlugin1(), self.TestPlugin2()], profile=True
+        )
+        for i in range(2):
+            replay = self.MockReplay([self.TestEvent("a")])
+            engine.run(replay)
+        self.assertEqual(
+            replay.plugin_timings["TestPlugin2"]["handleTestEvent"]["calls"], 6
+        )
+        self.assertEqual(
+            set(replay.plugin_timings["TestPlugin1"]),
+            {"handleInitGame", "handleTestEvent"},
+        )
+        self.assertEqual(
+            engine.plugin_timings["TestPlugin2"]["handleTestEvent"]["calls"], 12
+        )
+
+        engine.profile = False
+        engine.run(replay)
+        self.assertIsNone(replay.plugin_timings)
+
+    def test_event_types(self):
+        from sc2reader.engine.plugins import APMTracker, ContextLoader
+        from sc2reader.events import (
+            CommandEvent,
+            ControlGroupEvent,
+            PlayerLeaveEvent,
+            SelectionEvent,
+        )
+
+        engine = sc2reader.engine.GameEngine(plugins=[APMTracker()])
+        event_types = engine.event_types()
+        self.assertEqual(
+            event_types,
+            {CommandEvent, ControlGroupEvent, SelectionEvent, PlayerLeaveEvent},
+        )
+
+        # APMTracker needs the players attached to the events
+        engine = sc2reader.engine.GameEngine(plugins=[ContextLoader(), APMTracker()])
+        event_types = engine.event_types()
+        path = "test_replays/4.7.0.70154/1.SC2Replay"
+        full = sc2reader.load_replay(path, engine=engine)
+        replay = sc2reader.load_replay(path, engine=engine, event_types=event_types)
+        self.assertLess(len(replay.events), len(full.events))
+        self.assertEqual(
+            [human.avg_apm for human in replay.humans],
+            [human.avg_apm for human in full.humans],
+        )
+
+
+def replay_frames(replay):
+    return replay.frames
+
+
+def replay_error(replay):
+    return replay.frames / 0
+
+
+class TestBitPackedDecoder(unittest.TestCase):
+    def test_read_bits(self):
+        data = BitPackedDecoder(bytes([0xB5, 0xCA, 0x12, 0x34, 0x56, 0x78, 0x9A]))
+        self.assertEqual(data.read_bits(3), 5)
+        self.assertEqual(data.read_bits(7), 90)
+        self.assertEqual(data.read_uint8(), 202)
+        self.assertEqual(data.tell(), 3)
+        self.assertEqual(data.read_uint16(), 4306)
+        self.assertEqual(data.read_bool(), 1)
+        self.assertEqual(data.read_bits(13), 2680)
+        self.assertEqual(data.tell(), 6)
+        self.assertFalse(data.done())
+        data.byte_align()
+        self.assertEqual(data.read_uint8(), 0x9A)
+        self.assertTrue(data.done())
+
+    def test_read_struct(self):
+        contents = bytes([0x05, 0x04, 0x00, 0x06, 0x2A, 0x02, 0x02, 0x04])
+        data = BitPackedDecoder(memoryview(contents + b"hi\x09\x81\x01"))
+        self.assertEqual(data.read_struct(), {0: 42, 1: b"hi"})
+        self.assertEqual(data.read_struct(), -64)
+        self.assertTrue(data.done())
+
 
 class MockPlayer:
     def __init__(self):